@@ -0,0 +1,55 @@
+"""
+Compares the compiled structural schema pass with jsonschema and with the
+hand-walked validate_instructions checks on a large protocol.
+
+Run from the directory containing the protocol_validator package:
+
+    python -m protocol_validator.benchmarks.schema_benchmark [copies]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import timeit
+
+import jsonschema
+
+from protocol_validator.protocol_validator import JSONProtocolValidator
+from protocol_validator.schema import schema_validator
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+
+
+def main(copies=100):
+    with open(os.path.join(FIXTURES, 'protocol.json')) as protocol_json:
+        protocol_data = json.load(protocol_json)
+    protocol_data['instructions'] = protocol_data['instructions'] * copies
+    moves = sum(
+        len(group['transfer'])
+        for instruction in protocol_data['instructions']
+        for group in instruction['groups']
+    )
+
+    validator = schema_validator()
+    explainer = jsonschema.Draft4Validator(validator.compiler.schema)
+    hand_walked = JSONProtocolValidator(os.path.join(FIXTURES, 'containers.json'), protocol_data)
+    instructions = hand_walked.protocol.instructions
+
+    def run_hand_walked():
+        with contextlib.redirect_stdout(io.StringIO()):
+            hand_walked.validate_instructions(instructions)
+
+    timings = [
+        ('compiled schema', lambda: validator.is_valid(protocol_data)),
+        ('jsonschema', lambda: explainer.is_valid(protocol_data)),
+        ('hand-walked', run_hand_walked)
+    ]
+    print('{} transfer moves'.format(moves))
+    for name, check in timings:
+        seconds = min(timeit.repeat(check, number=1, repeat=3))
+        print('{:>16}: {:.4f}s'.format(name, seconds))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,127 @@
+from bisect import bisect_right
+
+
+class CalibrationCurve(object):
+    """
+    Piecewise-linear volume -> plunger position curve through a tool's
+    "points", where f1 is the volume and f2 the plunger position.
+
+    Segment slopes and intercepts are computed once, so converting a
+    volume costs one bisect and one multiply-add. Volumes outside the
+    points are extrapolated along the first or last segment.
+    """
+
+    __slots__ = ('volume_table', 'position_table', 'slopes', 'intercepts')
+
+    def __init__(self, points):
+        self.volume_table = [point['f1'] for point in points]
+        self.position_table = [point['f2'] for point in points]
+        self.slopes = []
+        self.intercepts = []
+        pairs = list(zip(self.volume_table, self.position_table))
+        if len(pairs) == 1:
+            # a single point is a line through the origin
+            volume, position = pairs[0]
+            self.slopes.append(position / volume if volume else 0.0)
+            self.intercepts.append(0.0)
+        for (v0, p0), (v1, p1) in zip(pairs, pairs[1:]):
+            slope = (p1 - p0) / (v1 - v0)
+            self.slopes.append(slope)
+            self.intercepts.append(p0 - slope * v0)
+
+    @staticmethod
+    def check(points) -> list:
+        """
+        Returns the problems keeping points from being a usable curve:
+        fewer than one point, or volumes and positions that do not
+        strictly increase together.
+        """
+        problems = []
+        if not points:
+            problems.append('MUST define at least one point')
+            return problems
+        previous = None
+        point_number = 0
+        for point in points:
+            point_number += 1
+            current = (point['f1'], point['f2'])
+            if previous is not None:
+                if current[0] <= previous[0]:
+                    problems.append(
+                        'point number {} "f1" MUST be greater than the previous point\'s'
+                        .format(point_number)
+                    )
+                elif current[1] <= previous[1]:
+                    problems.append(
+                        'point number {} "f2" MUST be greater than the previous point\'s, the curve is not monotonic'
+                        .format(point_number)
+                    )
+            previous = current
+        return problems
+
+    def position(self, volume):
+        segment = bisect_right(self.volume_table, volume) - 1
+        segment = min(max(segment, 0), len(self.slopes) - 1)
+        return self.slopes[segment] * volume + self.intercepts[segment]
+
+    def positions(self, volumes) -> list:
+        """
+        Batched position(), for many volumes at once.
+        """
+        volume_table = self.volume_table
+        slopes = self.slopes
+        intercepts = self.intercepts
+        last = len(slopes) - 1
+        positions = []
+        append = positions.append
+        for volume in volumes:
+            segment = bisect_right(volume_table, volume) - 1
+            if segment < 0:
+                segment = 0
+            elif segment > last:
+                segment = last
+            append(slopes[segment] * volume + intercepts[segment])
+        return positions
+
+    def in_range(self, position) -> bool:
+        """
+        Whether a position lies within the calibrated points (from zero
+        for a single-point curve) rather than being extrapolated.
+        """
+        low = self.position_table[0] if len(self.position_table) > 1 else 0
+        return low <= position <= self.position_table[-1]
+
+
+class CalibrationTable(object):
+    """
+    Calibration curves of every head tool whose points are usable,
+    built once per protocol.
+    """
+
+    def __init__(self, head):
+        self.curves = {}
+        for tool_name, tool in head.items():
+            points = tool.points
+            if not isinstance(points, list) or not all(_is_point(point) for point in points):
+                continue
+            if CalibrationCurve.check(points):
+                continue
+            self.curves[tool_name] = CalibrationCurve(points)
+
+    def positions(self, tool_name, volumes):
+        """
+        Converts volumes to plunger positions for a tool, or returns None
+        when the tool has no usable curve.
+        """
+        curve = self.curves.get(tool_name)
+        if curve is None:
+            return None
+        return curve.positions(volumes)
+
+
+def _is_point(point):
+    return (
+        isinstance(point, dict)
+        and isinstance(point.get('f1'), (int, float)) and not isinstance(point.get('f1'), bool)
+        and isinstance(point.get('f2'), (int, float)) and not isinstance(point.get('f2'), bool)
+    )
@@ -0,0 +1,201 @@
+import json
+
+from .loader import ProtocolLoadError
+from .model import Direction, Protocol, Record
+
+
+# top-level key of the shared directions of a compact protocol; reserved
+DIRECTION_TABLE = 'direction-table'
+REFERENCE = '$ref'
+# the keys a table entry may have: the directions of distribute and
+# consolidate commands also carry their own "volume"
+DIRECTION_KEYS = frozenset(key for key, slot in Direction.FIELDS) | {'volume'}
+
+
+def canonical_form(value):
+    """
+    Key-sorted deep copy of JSON data, with records turned back into dicts.
+    """
+    if isinstance(value, Record):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {key: canonical_form(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [canonical_form(item) for item in value]
+    return value
+
+
+def canonicalize(protocol_data: dict) -> dict:
+    """
+    Normalized, key-sorted protocol, read back from the parsed Protocol
+    model. Compact protocols are expanded first.
+    """
+    if is_compact(protocol_data):
+        protocol_data = expand(protocol_data)
+    protocol = Protocol(protocol_data)
+    data = dict(protocol_data)
+    for section_name, section in (('head', protocol.head), ('deck', protocol.deck)):
+        raw_section = protocol_data.get(section_name)
+        if isinstance(raw_section, dict):
+            # malformed entries are kept as they are, records would drop them
+            data[section_name] = {
+                name: record if isinstance(raw_section[name], dict) else raw_section[name]
+                for name, record in section.items()
+            }
+    if 'instructions' in protocol_data:
+        data['instructions'] = protocol.instructions
+    return canonical_form(data)
+
+
+def compact(protocol_data: dict) -> dict:
+    """
+    Canonical protocol where every direction used more than once is
+    stored once, in the top-level DIRECTION_TABLE list, and replaced by
+    {"$ref": index into that list}. expand() reverses it. Only well-formed
+    directions go in the table, others are left as they are.
+    """
+    data = canonicalize(protocol_data)
+    instructions = data.get('instructions')
+    if not isinstance(instructions, list):
+        return data
+
+    slots = list(_direction_slots(instructions))
+    keys = []
+    counts = {}
+    for holder, index in slots:
+        direction = holder[index]
+        key = None
+        if _is_reference(direction):
+            raise ValueError(
+                'Direction {} would be read as a reference, the protocol cannot be compacted'
+                .format(json.dumps(direction))
+            )
+        if _is_direction(direction):
+            # JSON text tells true from 1 and 1 from 1.0, unlike ==
+            key = json.dumps(direction)
+            counts[key] = counts.get(key, 0) + 1
+        keys.append(key)
+
+    table = []
+    references = {}
+    for (holder, index), key in zip(slots, keys):
+        if key is None:
+            continue
+        direction = holder[index]
+        if counts[key] > 1:
+            reference = references.get(key)
+            if reference is None:
+                reference = references[key] = {REFERENCE: len(table)}
+                table.append(direction)
+            holder[index] = dict(reference)
+    if table:
+        data[DIRECTION_TABLE] = table
+    return data
+
+
+def is_compact(protocol_data) -> bool:
+    return isinstance(protocol_data, dict) and DIRECTION_TABLE in protocol_data
+
+
+def expand(protocol_data: dict, max_bytes=None) -> dict:
+    """
+    Turns a compact protocol back into the plain format the validator
+    accepts; other protocols are returned unchanged.
+
+    Table entries MUST be directions. With max_bytes, the size of the
+    expanded JSON is worked out from the references before anything is
+    copied, and a protocol that would grow past it is rejected.
+    """
+    if not is_compact(protocol_data):
+        return protocol_data
+    table = protocol_data[DIRECTION_TABLE]
+    if not isinstance(table, list):
+        raise ProtocolLoadError('Protocol "{}" MUST be a list'.format(DIRECTION_TABLE))
+    for number, direction in enumerate(table):
+        if not _is_direction(direction):
+            raise ProtocolLoadError(
+                'Protocol "{}" entry {} MUST be a direction, with a "container", a "location" and only direction keys'
+                .format(DIRECTION_TABLE, number)
+            )
+    data = {key: value for key, value in protocol_data.items() if key != DIRECTION_TABLE}
+    if 'instructions' not in data:
+        return data
+
+    references = []
+    for holder, index in _direction_slots(data['instructions']):
+        direction = holder[index]
+        if _is_reference(direction):
+            reference = direction[REFERENCE]
+            if type(reference) is not int or not 0 <= reference < len(table):
+                raise ProtocolLoadError(
+                    'Direction reference {} is not in the protocol "{}"'.format(reference, DIRECTION_TABLE)
+                )
+            references.append(reference)
+    if max_bytes is not None:
+        sizes = [len(json.dumps(direction)) for direction in table]
+        size = len(json.dumps(data)) + sum(
+            sizes[reference] - len(json.dumps({REFERENCE: reference})) for reference in references
+        )
+        if size > max_bytes:
+            raise ProtocolLoadError(
+                'Protocol JSON is about {} bytes once expanded, which exceeds the limit of {} bytes'
+                .format(size, max_bytes)
+            )
+
+    # copied, as references are replaced in place
+    data['instructions'] = instructions = canonical_form(data['instructions'])
+    for holder, index in _direction_slots(instructions):
+        if _is_reference(holder[index]):
+            holder[index] = canonical_form(table[holder[index][REFERENCE]])
+    return data
+
+
+def to_json(protocol_data: dict) -> str:
+    """
+    Canonical JSON text: sorted keys, no insignificant whitespace.
+    """
+    return json.dumps(protocol_data, sort_keys=True, separators=(',', ':'))
+
+
+def _is_direction(value):
+    return (
+        isinstance(value, dict) and 'container' in value and 'location' in value
+        and DIRECTION_KEYS.issuperset(value)
+    )
+
+
+def _is_reference(value):
+    return isinstance(value, dict) and len(value) == 1 and REFERENCE in value
+
+
+def _direction_slots(instructions):
+    """
+    Yields (holder, key or index) for every direction of the instructions,
+    so that holder[key] is the direction.
+    """
+    if not isinstance(instructions, list):
+        return
+    for instruction in instructions:
+        if not isinstance(instruction, dict) or not isinstance(instruction.get('groups'), list):
+            continue
+        for group in instruction['groups']:
+            if not isinstance(group, dict) or len(group) != 1:
+                continue
+            command_name, command_value = list(group.items())[0]
+            if command_name == 'transfer' and isinstance(command_value, list):
+                for move in command_value:
+                    if isinstance(move, dict):
+                        for key in ('from', 'to'):
+                            if key in move:
+                                yield move, key
+            elif command_name in ('distribute', 'consolidate') and isinstance(command_value, dict):
+                for key in ('from', 'to'):
+                    value = command_value.get(key)
+                    if isinstance(value, list):
+                        for index in range(len(value)):
+                            yield value, index
+                    elif key in command_value:
+                        yield command_value, key
+            elif command_name == 'mix' and isinstance(command_value, list):
+                for index in range(len(command_value)):
+                    yield command_value, index
@@ -0,0 +1,53 @@
+import math
+
+
+class CapacityTable(object):
+    """
+    Per-tool pipette capacities, computed once per protocol so volume
+    checks cost a dict lookup and a division per move.
+
+    A tool holds its "volume" minus its "extra-pull-volume" in a transfer;
+    a distribute also keeps "distribute-percentage" of the tool volume as
+    a margin, so it holds volume * (1 - distribute-percentage) minus the
+    extra pull.
+    """
+
+    def __init__(self, head):
+        self.capacities = {}
+        for tool_name, tool in head.items():
+            self.capacities[tool_name] = self.tool_capacity(tool)
+
+    @staticmethod
+    def tool_capacity(tool):
+        """
+        Returns (transfer capacity, distribute capacity) in microlitres, or
+        None when the tool volumes are not usable numbers.
+        """
+        volume = tool.volume
+        if not _is_number(volume) or volume <= 0:
+            return None
+        extra_pull_volume = tool.extra_pull_volume if _is_number(tool.extra_pull_volume) else 0
+        distribute_percentage = tool.distribute_percentage if _is_number(tool.distribute_percentage) else 0
+        transfer = volume - extra_pull_volume
+        distribute = volume * (1 - distribute_percentage) - extra_pull_volume
+        return transfer, distribute
+
+    def capacity(self, tool_name, distribute=False):
+        capacities = self.capacities.get(tool_name)
+        if capacities is None:
+            return None
+        return capacities[1 if distribute else 0]
+
+    def aspirations(self, tool_name, volume, distribute=False):
+        """
+        Returns how many aspirations moving volume takes with the tool, or
+        None if that cannot be known.
+        """
+        capacity = self.capacity(tool_name, distribute)
+        if capacity is None or capacity <= 0 or not _is_number(volume) or volume < 0:
+            return None
+        return max(1, math.ceil(volume / capacity))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,209 @@
+from operator import itemgetter
+
+
+COORDINATES = ('x', 'y', 'z')
+
+
+class CatalogLinter(object):
+    """
+    Checks a containers catalog ({"containers": {labware: {...}}}) for
+    mistakes made editing it by hand.
+
+    Every labware is checked in one pass over its wells, which collects
+    their coordinates into lists; duplicate coordinates and grid spacing
+    are then found by sorting those lists and comparing neighbours, rather
+    than by comparing every pair of wells.
+    """
+
+    # mm two distinct well x (or y) values must differ by to count as steps
+    # of a regular grid
+    SPACING_TOLERANCE = 0.01
+    # distinct x (or y) values closer than this fraction of the labware's
+    # usual step are taken for wells meant to be aligned
+    ALIGNMENT_FRACTION = 0.25
+
+    def __init__(self, catalog_data: dict):
+        self.catalog_data = catalog_data
+        self.errors = []
+        self.warnings = []
+
+    def lint(self):
+        containers = self.catalog_data.get('containers') if isinstance(self.catalog_data, dict) else None
+        if not isinstance(containers, dict):
+            self.errors.append('Containers JSON MUST define a "containers" object')
+            return self
+        for labware_name, labware in containers.items():
+            self.lint_labware(labware_name, labware)
+        return self
+
+    def lint_labware(self, labware_name, labware):
+        if not isinstance(labware, dict) or not isinstance(labware.get('locations'), dict):
+            self.errors.append(
+                'Labware "{}" MUST define a "locations" object'.format(labware_name)
+            )
+            return
+        locations = labware['locations']
+        if not locations:
+            self.errors.append(
+                'Labware "{}" MUST define at least one location'.format(labware_name)
+            )
+            return
+
+        positions = []
+        for location_name, location in locations.items():
+            position = self.lint_location(labware_name, location_name, location)
+            if position is not None:
+                positions.append(position + (location_name,))
+
+        # duplicates are neighbours once sorted by coordinates
+        positions.sort()
+        for previous, current in zip(positions, positions[1:]):
+            if previous[:3] == current[:3]:
+                self.errors.append(
+                    'Labware "{}" locations "{}" and "{}" have the same coordinates'
+                    .format(labware_name, previous[3], current[3])
+                )
+
+        for axis in (0, 1):
+            self.lint_grid(labware_name, positions, axis)
+
+    def lint_location(self, labware_name, location_name, location):
+        """
+        Checks a single location, returning its (x, y, z) when usable
+        """
+        if not isinstance(location, dict):
+            self.errors.append(
+                'Labware "{}" location "{}" MUST be an object'.format(labware_name, location_name)
+            )
+            return None
+        missing = [key for key in COORDINATES if not _is_number(location.get(key))]
+        if missing:
+            self.errors.append(
+                'Labware "{}" location "{}" MUST define numeric {}'
+                .format(labware_name, location_name, ', '.join('"{}"'.format(key) for key in missing))
+            )
+        volume = location.get('total-liquid-volume')
+        if volume is not None and (not _is_number(volume) or volume <= 0):
+            self.errors.append(
+                'Labware "{}" location "{}" "total-liquid-volume" MUST be a positive number'
+                .format(labware_name, location_name)
+            )
+        if 'depth' in location and volume is None:
+            self.warnings.append(
+                'Labware "{}" location "{}" defines a "depth" but no "total-liquid-volume"'
+                .format(labware_name, location_name)
+            )
+        if 'diameter' not in location and not ('length' in location and 'width' in location):
+            self.warnings.append(
+                'Labware "{}" location "{}" defines neither a "diameter" nor a "length" and "width"'
+                .format(labware_name, location_name)
+            )
+        if missing:
+            return None
+        return location['x'], location['y'], location['z']
+
+    def lint_grid(self, labware_name, positions, axis):
+        """
+        Checks the spacing of the wells along one axis: distinct values
+        that nearly coincide are misaligned wells, and a full rectangular
+        grid MUST have a single step.
+        """
+        if len(positions) < 2:
+            return
+        axis_name = COORDINATES[axis]
+        values = sorted(set(map(itemgetter(axis), positions)))
+        steps = [b - a for a, b in zip(values, values[1:])]
+        if not steps:
+            return
+        usual_step = sorted(steps)[len(steps) // 2]
+        for value, step in zip(values, steps):
+            if step < usual_step * self.ALIGNMENT_FRACTION:
+                self.warnings.append(
+                    'Labware "{}" has locations at {} {} and {}, nearly but not exactly aligned'
+                    .format(labware_name, axis_name, value, value + step)
+                )
+
+        other_values = set(map(itemgetter(1 - axis), positions))
+        if len(positions) == len(values) * len(other_values):
+            if max(steps) - min(steps) > self.SPACING_TOLERANCE:
+                self.warnings.append(
+                    'Labware "{}" grid has irregular {} spacing ({})'
+                    .format(labware_name, axis_name, ', '.join(str(step) for step in sorted(set(steps))))
+                )
+
+    def messages(self) -> dict:
+        return {'errors': self.errors, 'warnings': self.warnings}
+
+
+def lint_catalog(catalog_data: dict) -> dict:
+    return CatalogLinter(catalog_data).lint().messages()
+
+
+def diff_catalogs(old_data: dict, new_data: dict) -> dict:
+    """
+    Structural difference between two versions of a containers catalog:
+    {'added': [labware], 'removed': [labware], 'changed': {labware: {
+    'added': [locations], 'removed': [locations], 'changed': [locations],
+    'fields': [labware keys]}}}. Names are listed sorted.
+    """
+    old_containers = old_data.get('containers') or {}
+    new_containers = new_data.get('containers') or {}
+    added, removed, common = _merge(old_containers, new_containers)
+    changed = {}
+    for labware_name in common:
+        old_labware = old_containers[labware_name]
+        new_labware = new_containers[labware_name]
+        if old_labware == new_labware:
+            continue
+        if not isinstance(old_labware, dict):
+            old_labware = {}
+        if not isinstance(new_labware, dict):
+            new_labware = {}
+        old_locations = old_labware.get('locations') or {}
+        new_locations = new_labware.get('locations') or {}
+        locations_added, locations_removed, locations_common = _merge(old_locations, new_locations)
+        fields = sorted(
+            key for key in set(old_labware) | set(new_labware)
+            if key != 'locations' and old_labware.get(key) != new_labware.get(key)
+        )
+        changed[labware_name] = {
+            'added': locations_added,
+            'removed': locations_removed,
+            'changed': [
+                location_name for location_name in locations_common
+                if old_locations[location_name] != new_locations[location_name]
+            ],
+            'fields': fields
+        }
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def _merge(old, new):
+    """
+    Walks the sorted keys of two dicts side by side, returning the keys
+    only in new, only in old, and in both.
+    """
+    old_keys = sorted(old)
+    new_keys = sorted(new)
+    added = []
+    removed = []
+    common = []
+    i = j = 0
+    while i < len(old_keys) and j < len(new_keys):
+        if old_keys[i] == new_keys[j]:
+            common.append(old_keys[i])
+            i += 1
+            j += 1
+        elif old_keys[i] < new_keys[j]:
+            removed.append(old_keys[i])
+            i += 1
+        else:
+            added.append(new_keys[j])
+            j += 1
+    removed.extend(old_keys[i:])
+    added.extend(new_keys[j:])
+    return added, removed, common
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,78 @@
+from .model import Deck
+
+
+class DeckLayout(object):
+    """
+    Slot occupancy of a single deck, built in one pass over its containers.
+
+    Containers without a "labware" or with a slot that is not on the deck
+    are left out, as they are reported by validate_deck already. Slot-less
+    containers, by name, are given the free slots in slot order as
+    auto-placement suggestions, so that the layout does not depend on the
+    order of the deck keys.
+    """
+
+    def __init__(self, deck_data: dict, slots: list):
+        self.slots = slots
+        self.occupancy = {}
+        self.unassigned = []
+        self.suggestions = {}
+
+        if not isinstance(deck_data, Deck):
+            deck_data = Deck(deck_data)
+
+        slot_set = set(slots)
+        for container_name, container_definition in deck_data.items():
+            if container_definition.labware is None:
+                continue
+            slot = container_definition.slot
+            if slot is None:
+                self.unassigned.append(container_name)
+            elif slot in slot_set:
+                self.occupancy.setdefault(slot, []).append(container_name)
+
+        self.unassigned.sort()
+        free_slots = (slot for slot in slots if slot not in self.occupancy)
+        for container_name, slot in zip(self.unassigned, free_slots):
+            self.suggestions[container_name] = slot
+
+    def collisions(self) -> dict:
+        """
+        Returns {slot: [container names]} for every slot holding more than
+        one container.
+        """
+        return {
+            slot: sorted(containers)
+            for slot, containers in self.occupancy.items()
+            if len(containers) > 1
+        }
+
+    def messages(self) -> dict:
+        errors = []
+        warnings = []
+        for slot, containers in self.collisions().items():
+            errors.append(
+                'Deck containers {} all occupy slot "{}", only one container fits in a slot'
+                .format(', '.join('"{}"'.format(name) for name in containers), slot)
+            )
+        for container_name in self.unassigned:
+            suggestion = self.suggestions.get(container_name)
+            if suggestion is None:
+                warnings.append(
+                    'Deck container "{}" does not specify a "slot" attribute, and no free slot is left on Deck'
+                    .format(container_name)
+                )
+            else:
+                warnings.append(
+                    'Deck container "{}" does not specify a "slot" attribute, but it is recommended (free slot "{}" suggested)'
+                    .format(container_name, suggestion)
+                )
+        return {'errors': errors, 'warnings': warnings}
+
+
+def check_layouts(decks, slots) -> list:
+    """
+    Checks many deck layouts in bulk, e.g. every protocol of a batch run.
+    Returns one messages dict per deck, in order.
+    """
+    return [DeckLayout(deck_data, slots).messages() for deck_data in decks]
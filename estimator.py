@@ -0,0 +1,221 @@
+import math
+
+
+class RunTimeEstimator(object):
+    """
+    Estimates how long a protocol takes to run on the robot.
+
+    Every instruction is expanded into a flat list of well visits (tip
+    pick-up, aspirate, dispense, tip drop), held as parallel columns; the
+    travel, plunger and tip-change times are then computed column-wise in
+    a few passes over those lists.
+
+    The deck geometry is approximated: slot "B3" sits SLOT_PITCH
+    millimetres per letter and per number from slot "A1", and wells are
+    offset by their container x/y. One tip is used per group.
+    """
+
+    SLOT_PITCH = (100.0, 100.0)     # mm between slot origins (letter, number)
+    HEAD_SPEED = 50.0               # mm/s of x/y travel
+    WELL_VISIT = 1.0                # s to lower into and rise out of a well
+    PLUNGER_STROKE = 20.0           # mm of plunger travel for a tool's full volume
+    TIP_PICKUP = 2.0                # s
+    TIP_DROP = 2.0                  # s
+
+    def __init__(self, protocol, containers, **constants):
+        for name, value in constants.items():
+            if not hasattr(self, name.upper()):
+                raise TypeError('Unknown estimator constant "{}"'.format(name))
+            setattr(self, name.upper(), value)
+        self.protocol = protocol
+        self.containers = containers
+        self._positions = {}
+        self._tool_rates = {}
+
+    # -- geometry
+
+    def slot_origin(self, slot):
+        if not slot:
+            return 0.0, 0.0
+        letter, number = slot[0], slot[1:]
+        try:
+            row = int(number) - 1
+        except ValueError:
+            row = 0
+        return (ord(letter.upper()) - ord('A')) * self.SLOT_PITCH[0], row * self.SLOT_PITCH[1]
+
+    def position(self, container, location):
+        """
+        Absolute (x, y) of a well, or None when it cannot be resolved.
+        """
+        key = (container, location)
+        position = self._positions.get(key, False)
+        if position is False:
+            position = None
+            entry = self.protocol.deck.get(container)
+            if entry is not None:
+                labware = self.containers.data.get('containers', {}).get(entry.labware) or {}
+                well = labware.get('locations', {}).get(location)
+                if well is not None:
+                    origin_x, origin_y = self.slot_origin(entry.slot)
+                    position = (origin_x + well.get('x', 0), origin_y + well.get('y', 0))
+            self._positions[key] = position
+        return position
+
+    def first_position(self, container):
+        entry = self.protocol.deck.get(container)
+        if entry is None:
+            return None
+        labware = self.containers.data.get('containers', {}).get(entry.labware) or {}
+        locations = labware.get('locations') or {}
+        if not locations:
+            return None
+        return self.position(container, next(iter(locations)))
+
+    # -- plunger
+
+    def tool_rates(self, tool_name):
+        """
+        Returns (aspirate, dispense) seconds per microlitre for a tool.
+        """
+        rates = self._tool_rates.get(tool_name)
+        if rates is None:
+            tool = self.protocol.head.get(tool_name)
+            rates = (0.0, 0.0)
+            if tool is not None and isinstance(tool.volume, (int, float)) and tool.volume > 0:
+                stroke_per_ul = self.PLUNGER_STROKE / tool.volume
+                rates = tuple(
+                    stroke_per_ul / (speed / 60.0) if isinstance(speed, (int, float)) and speed > 0 else 0.0
+                    for speed in (tool.up_plunger_speed, tool.down_plunger_speed)
+                )
+            self._tool_rates[tool_name] = rates
+        return rates
+
+    # -- expansion
+
+    def expand(self):
+        """
+        Flattens the instructions into parallel columns, one entry per
+        visit: instruction index, x, y, plunger seconds, tip-change
+        seconds and delay seconds.
+        """
+        columns = {'instruction': [], 'x': [], 'y': [], 'plunger': [], 'tip': [], 'delay': []}
+        append_instruction = columns['instruction'].append
+        append_x = columns['x'].append
+        append_y = columns['y'].append
+        append_plunger = columns['plunger'].append
+        append_tip = columns['tip'].append
+        append_delay = columns['delay'].append
+
+        def visit(index, position, plunger=0.0, tip=0.0, delay=0.0):
+            if position is None:
+                return
+            append_instruction(index)
+            append_x(position[0])
+            append_y(position[1])
+            append_plunger(plunger)
+            append_tip(tip)
+            append_delay(delay)
+
+        def direction_visit(index, direction, seconds_per_ul, volume):
+            if not isinstance(direction, dict):
+                return
+            delay = direction.get('delay', 0)
+            visit(index, self.position(direction.get('container'), direction.get('location')),
+                  plunger=seconds_per_ul * volume,
+                  delay=delay if isinstance(delay, (int, float)) and delay > 0 else 0.0)
+
+        for index, instruction in enumerate(self.protocol.instructions):
+            if not isinstance(instruction, dict) or not isinstance(instruction.get('groups'), list):
+                continue
+            tool_name = instruction.get('tool')
+            tool = self.protocol.head.get(tool_name)
+            aspirate, dispense = self.tool_rates(tool_name)
+            tip_rack = trash = None
+            if tool is not None:
+                if isinstance(tool.tip_racks, list) and tool.tip_racks and isinstance(tool.tip_racks[0], dict):
+                    tip_rack = self.first_position(tool.tip_racks[0].get('container'))
+                if isinstance(tool.trash_container, dict):
+                    trash = self.first_position(tool.trash_container.get('container'))
+            tool_volume = tool.volume if tool is not None and isinstance(tool.volume, (int, float)) else 0
+
+            for group in instruction['groups']:
+                if not isinstance(group, dict) or len(group) != 1:
+                    continue
+                command_name, command_value = list(group.items())[0]
+                visit(index, tip_rack, tip=self.TIP_PICKUP)
+                if command_name == 'transfer' and isinstance(command_value, list):
+                    for move in command_value:
+                        if not isinstance(move, dict):
+                            continue
+                        volume = move.get('volume')
+                        volume = volume if isinstance(volume, (int, float)) and volume > 0 else 0
+                        direction_visit(index, move.get('from'), aspirate, volume)
+                        direction_visit(index, move.get('to'), dispense, volume)
+                elif command_name in ('distribute', 'consolidate') and isinstance(command_value, dict):
+                    single = command_value.get('from' if command_name == 'distribute' else 'to')
+                    many = command_value.get('to' if command_name == 'distribute' else 'from')
+                    if not isinstance(many, list):
+                        many = []
+                    volumes = [_direction_volume(direction, 0) for direction in many]
+                    single_rate, many_rate = (aspirate, dispense) if command_name == 'distribute' else (dispense, aspirate)
+                    if command_name == 'distribute':
+                        direction_visit(index, single, single_rate, sum(volumes))
+                    for direction, volume in zip(many, volumes):
+                        direction_visit(index, direction, many_rate, volume)
+                    if command_name == 'consolidate':
+                        direction_visit(index, single, single_rate, sum(volumes))
+                elif command_name == 'mix' and isinstance(command_value, list):
+                    for direction in command_value:
+                        volume = _direction_volume(direction, tool_volume)
+                        repetitions = direction.get('repetitions', 1) if isinstance(direction, dict) else 1
+                        if not isinstance(repetitions, int) or repetitions < 1:
+                            repetitions = 1
+                        direction_visit(index, direction, (aspirate + dispense) * repetitions, volume)
+                visit(index, trash, tip=self.TIP_DROP)
+        return columns
+
+    def estimate(self) -> dict:
+        """
+        Returns per-instruction and total run time, in seconds, split into
+        move, plunger (aspirate/dispense), tip-change and delay time.
+        """
+        columns = self.expand()
+        xs = columns['x']
+        ys = columns['y']
+        hypot = math.hypot
+        speed = self.HEAD_SPEED
+        visit_seconds = self.WELL_VISIT
+        # travel from the previous visit, plus lowering into the well
+        moves = [visit_seconds] * len(xs)
+        if xs:
+            moves[1:] = [
+                hypot(x1 - x0, y1 - y0) / speed + visit_seconds
+                for x0, y0, x1, y1 in zip(xs, ys, xs[1:], ys[1:])
+            ]
+
+        instructions = [
+            {'move': 0.0, 'plunger': 0.0, 'tip_change': 0.0, 'delay': 0.0, 'total': 0.0}
+            for instruction in self.protocol.instructions
+        ]
+        for index, move, plunger, tip, delay in zip(columns['instruction'], moves, columns['plunger'],
+                                                    columns['tip'], columns['delay']):
+            times = instructions[index]
+            times['move'] += move
+            times['plunger'] += plunger
+            times['tip_change'] += tip
+            times['delay'] += delay
+
+        total = {'move': 0.0, 'plunger': 0.0, 'tip_change': 0.0, 'delay': 0.0, 'total': 0.0}
+        for times in instructions:
+            times['total'] = times['move'] + times['plunger'] + times['tip_change'] + times['delay']
+            for key in total:
+                total[key] += times[key]
+        return {'instructions': instructions, 'total': total, 'visits': len(xs)}
+
+
+def _direction_volume(direction, default):
+    if not isinstance(direction, dict):
+        return default
+    volume = direction.get('volume')
+    return volume if isinstance(volume, (int, float)) and volume > 0 else default
@@ -0,0 +1,160 @@
+class IngredientTracker(object):
+    """
+    Propagates ingredients from their initial wells through the
+    instruction stream.
+
+    Every ingredient is a bit and every well holds two bitsets: "intended"
+    follows the liquid the protocol actually moves, "actual" additionally
+    follows what a reused tip carries over between wells. A well whose
+    actual bits are not all intended has an unexpected mixture.
+
+    One tip is assumed per group: every aspirate and dispense of a
+    transfer, distribute, consolidate or mix group shares the same tip.
+    """
+
+    def __init__(self, ingredients_data: dict):
+        self.names = []
+        self.wells = {}
+        self.well_names = []
+        self.intended = []
+        self.actual = []
+        self.tip_reuse = []
+
+        for bit, (name, placements) in enumerate(ingredients_data.items()):
+            self.names.append(name)
+            if not isinstance(placements, list):
+                continue
+            for placement in placements:
+                if not isinstance(placement, dict):
+                    continue
+                well = self._well(placement.get('container'), placement.get('location'))
+                self.intended[well] |= 1 << bit
+                self.actual[well] |= 1 << bit
+
+    def _well(self, container, location) -> int:
+        key = (container, location)
+        well = self.wells.get(key)
+        if well is None:
+            well = self.wells[key] = len(self.well_names)
+            self.well_names.append(key)
+            self.intended.append(0)
+            self.actual.append(0)
+        return well
+
+    def _direction_well(self, direction):
+        if not isinstance(direction, dict):
+            return None
+        container = direction.get('container')
+        location = direction.get('location')
+        if container is None or location is None:
+            return None
+        return self._well(container, location)
+
+    def run(self, instructions_data):
+        """
+        Walks every instruction, updating the per-well bitsets and
+        recording tips reused across sources with different contents.
+        """
+        instruction_number = 0
+        for instruction in instructions_data:
+            instruction_number += 1
+            groups = instruction.get('groups') if isinstance(instruction, dict) else None
+            if not isinstance(groups, list):
+                continue
+            group_number = 0
+            for group in groups:
+                group_number += 1
+                if not isinstance(group, dict) or len(group) != 1:
+                    continue
+                command_name, command_value = list(group.items())[0]
+                self._run_group(command_name, command_value, instruction_number, group_number)
+
+    def _run_group(self, command_name, command_value, instruction_number, group_number):
+        # [bits of the liquid held, bits of everything the tip has touched,
+        #  last source well]; the held liquid is emptied after dispensing
+        tip = [0, 0, None]
+        location = (instruction_number, group_number)
+        if command_name == 'transfer' and isinstance(command_value, list):
+            for move in command_value:
+                if not isinstance(move, dict):
+                    continue
+                source = self._direction_well(move.get('from'))
+                self._aspirate(tip, source, location)
+                self._dispense(tip, self._direction_well(move.get('to')))
+                tip[0] = 0
+        elif command_name in ('distribute', 'consolidate') and isinstance(command_value, dict):
+            singles = command_value.get('from' if command_name == 'distribute' else 'to')
+            many = command_value.get('to' if command_name == 'distribute' else 'from')
+            if not isinstance(many, list):
+                return
+            if command_name == 'distribute':
+                self._aspirate(tip, self._direction_well(singles), location)
+                for direction in many:
+                    self._dispense(tip, self._direction_well(direction))
+                tip[0] = 0
+            else:
+                for direction in many:
+                    self._aspirate(tip, self._direction_well(direction), location)
+                self._dispense(tip, self._direction_well(singles))
+                tip[0] = 0
+        elif command_name == 'mix' and isinstance(command_value, list):
+            for direction in command_value:
+                well = self._direction_well(direction)
+                self._aspirate(tip, well, location)
+                self._dispense(tip, well)
+                tip[0] = 0
+
+    def _aspirate(self, tip, well, location):
+        if well is None:
+            return
+        previous = tip[2]
+        if previous is not None and previous != well and self.intended[previous] != self.intended[well]:
+            self.tip_reuse.append((location, previous, well))
+        # residue on the tip ends up in the source well
+        self.actual[well] |= tip[1]
+        tip[0] |= self.intended[well]
+        tip[1] |= self.actual[well]
+        tip[2] = well
+
+    def _dispense(self, tip, well):
+        if well is None:
+            return
+        self.intended[well] |= tip[0]
+        self.actual[well] |= tip[1]
+
+    def ingredient_names(self, bits) -> list:
+        names = []
+        bit = 0
+        while bits:
+            if bits & 1:
+                names.append(self.names[bit])
+            bits >>= 1
+            bit += 1
+        return names
+
+    def unexpected_mixtures(self) -> list:
+        """
+        Returns (container, location, ingredient names) for every well that
+        received ingredients only through tip carry-over.
+        """
+        mixtures = []
+        for well, actual in enumerate(self.actual):
+            unexpected = actual & ~self.intended[well]
+            if unexpected:
+                container, location = self.well_names[well]
+                mixtures.append((container, location, self.ingredient_names(unexpected)))
+        return mixtures
+
+    def messages(self) -> dict:
+        warnings = []
+        for (instruction_number, group_number), previous, well in self.tip_reuse:
+            warnings.append(
+                'Tip reused across sources container "{}" location "{}" and container "{}" location "{}" holding different ingredients, at instruction number {}, group number {}'
+                .format(*(self.well_names[previous] + self.well_names[well] + (instruction_number, group_number)))
+            )
+        for container, location, names in self.unexpected_mixtures():
+            warnings.append(
+                'Container "{}" location "{}" receives unexpected ingredients {} through tip carry-over'
+                .format(container, location, names)
+            )
+        return {'errors': [], 'warnings': warnings}
@@ -0,0 +1,273 @@
+import os
+import re
+import time
+
+from . import loader
+
+
+class ProtocolLimits(object):
+    """
+    Resource guards applied to a protocol before it is fully parsed.
+
+    Every limit defaults to None (unlimited). Raw inputs (file paths and
+    JSON strings) are pre-scanned as a token stream, so an oversized
+    protocol is rejected without ever materializing it.
+    """
+
+    COMMAND_TYPES = ['transfer', 'distribute', 'consolidate', 'mix']
+
+    CHUNK_SIZE = 1 << 16
+
+    # a string opening or a structural char
+    _TOKEN = re.compile(r'["{}\[\]:,]')
+    # the body of a string, up to its closing quote or a trailing backslash
+    _STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*')
+
+    def __init__(self, max_bytes=None, max_instructions=None, max_groups=None,
+                 max_commands=None, max_depth=None, max_seconds=None):
+        self.max_bytes = max_bytes
+        self.max_instructions = max_instructions
+        self.max_groups = max_groups
+        self.max_commands = max_commands
+        self.max_depth = max_depth
+        self.max_seconds = max_seconds
+
+    def check(self, protocol) -> dict:
+        """
+        Pre-scans a protocol given as anything loader.load() accepts and
+        returns the usual errors/warnings messages dict. Scanning stops at
+        the first exceeded limit.
+        """
+        return self.check_resolved(*loader.resolve(protocol))
+
+    def check_resolved(self, kind, value) -> dict:
+        """
+        Same as check(), for a (kind, value) pair from loader.resolve().
+        """
+        scan = _Scan(self)
+        try:
+            if kind == loader.DICT:
+                self._check_dict(value, scan)
+            elif kind == loader.PATH:
+                self._check_file(value, scan)
+            else:
+                self._check_string(value, scan)
+        except _LimitExceeded as exceeded:
+            scan.errors.append(str(exceeded))
+        return {'errors': scan.errors, 'warnings': []}
+
+    def _check_size(self, size):
+        if self.max_bytes is not None and size > self.max_bytes:
+            raise _LimitExceeded(
+                'Protocol JSON is {} bytes, which exceeds the limit of {} bytes'
+                .format(size, self.max_bytes)
+            )
+
+    def _check_file(self, path, scan):
+        try:
+            self._check_size(os.path.getsize(path))
+        except OSError:
+            # missing files are reported when the protocol is loaded
+            return
+        with open(path, encoding='utf-8', errors='replace') as protocol_file:
+            while True:
+                chunk = protocol_file.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                scan.feed(chunk)
+                scan.check_time()
+
+    def _check_string(self, text, scan):
+        if isinstance(text, (bytes, bytearray, memoryview)):
+            size = text.nbytes if isinstance(text, memoryview) else len(text)
+            text = str(text, 'utf-8', 'replace')
+        else:
+            size = len(text) if text.isascii() else len(text.encode('utf-8'))
+        self._check_size(size)
+        for start in range(0, len(text), self.CHUNK_SIZE):
+            scan.feed(text[start:start + self.CHUNK_SIZE])
+            scan.check_time()
+
+    def _check_dict(self, protocol, scan):
+        # already materialized, so only structure (not bytes) is checked
+        instructions = protocol.get('instructions')
+        if isinstance(instructions, list):
+            scan.count('instructions', len(instructions))
+            for instruction in instructions:
+                groups = instruction.get('groups') if isinstance(instruction, dict) else None
+                if not isinstance(groups, list):
+                    continue
+                scan.count('groups', len(groups))
+                commands = 0
+                for group in groups:
+                    if not isinstance(group, dict):
+                        continue
+                    for command_name, command_value in group.items():
+                        if isinstance(command_value, dict):
+                            command_value = command_value.get(
+                                'from' if command_name == 'consolidate' else 'to')
+                        if isinstance(command_value, list):
+                            commands += len(command_value)
+                            scan.count('commands', commands)
+                scan.check_time()
+
+        if self.max_depth is not None:
+            stack = [(protocol, 1)]
+            while stack:
+                value, depth = stack.pop()
+                scan.depth(depth)
+                children = value.values() if isinstance(value, dict) else value
+                for child in children:
+                    if isinstance(child, (dict, list)):
+                        stack.append((child, depth + 1))
+
+
+class _LimitExceeded(Exception):
+    pass
+
+
+class _Scan(object):
+    """
+    Incremental JSON token scanner that tracks nesting and counts the
+    elements of the instructions, groups and command arrays.
+
+    A string left open at the end of a chunk is carried over as state
+    (whether the chunk ended on a backslash, and the start of the string
+    for keys), so every character is scanned once however long the
+    string.
+    """
+
+    # strings are only kept as far as needed to recognize keys
+    KEY_LENGTH = 64
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.errors = []
+        self.started = time.monotonic()
+        # frames of [opening char, key in parent, element count]
+        self.stack = []
+        self.last_string = None
+        self.key = None
+        self.in_string = False
+        self.escape = False
+        self.string = ''
+
+    def check_time(self):
+        max_seconds = self.limits.max_seconds
+        if max_seconds is not None and time.monotonic() - self.started > max_seconds:
+            raise _LimitExceeded(
+                'Protocol pre-scan exceeded the time limit of {} seconds'
+                .format(max_seconds)
+            )
+
+    def depth(self, depth):
+        max_depth = self.limits.max_depth
+        if max_depth is not None and depth > max_depth:
+            raise _LimitExceeded(
+                'Protocol JSON nesting exceeds the limit of {} levels'
+                .format(max_depth)
+            )
+
+    def count(self, kind, number):
+        limit = getattr(self.limits, 'max_' + kind)
+        if limit is not None and number > limit:
+            raise _LimitExceeded(
+                'Protocol has more than {} {}{}'
+                .format(limit, kind, '' if kind == 'instructions' else ' in a single instruction')
+            )
+
+    def _kind(self):
+        """
+        Returns which limit the array on top of the stack counts towards.
+        """
+        stack = self.stack
+        depth = len(stack)
+        key = stack[-1][1]
+        if depth == 2 and key == 'instructions':
+            return 'instructions'
+        if depth == 4 and key == 'groups' and stack[1][1] == 'instructions':
+            return 'groups'
+        if depth < 6 or stack[1][1] != 'instructions':
+            return None
+        if depth == 6 and key in ProtocolLimits.COMMAND_TYPES:
+            return 'commands'
+        if depth == 7 and key in ('to', 'from') and stack[-2][1] in ('distribute', 'consolidate'):
+            return 'commands'
+        return None
+
+    def _element(self, number):
+        frame = self.stack[-1]
+        added = number - frame[2]
+        frame[2] = number
+        kind = self._kind()
+        if kind == 'commands':
+            # commands are limited per instruction, like groups; the
+            # instruction object's own (otherwise unused) count holds the sum
+            instruction = self.stack[2]
+            instruction[2] += added
+            self.count('commands', instruction[2])
+        elif kind is not None:
+            self.count(kind, number)
+
+    def feed(self, text):
+        """
+        Consumes a chunk of JSON text.
+        """
+        position = 0
+        if self.in_string:
+            position = self._string_body(text, 0)
+        stack = self.stack
+        search = ProtocolLimits._TOKEN.search
+        while position is not None:
+            match = search(text, position)
+            if match is None:
+                return
+            char = match.group()
+            position = match.end()
+            in_array = bool(stack) and stack[-1][0] == '['
+            if char == '"':
+                if in_array and stack[-1][2] == 0:
+                    self._element(1)
+                self.in_string = True
+                self.string = ''
+                position = self._string_body(text, position)
+            elif char == ':':
+                self.key = self.last_string
+            elif char == ',':
+                if in_array:
+                    count = stack[-1][2]
+                    self._element(2 if count == 0 else count + 1)
+            elif char in '{[':
+                if in_array and stack[-1][2] == 0:
+                    self._element(1)
+                key = self.key if stack and stack[-1][0] == '{' else None
+                stack.append([char, key, 0])
+                self.depth(len(stack))
+                self.key = None
+            elif stack:
+                stack.pop()
+
+    def _string_body(self, text, position):
+        """
+        Scans the open string from position; returns the position after
+        its closing quote, or None when the string goes on past the chunk.
+        """
+        start = position
+        if self.escape:
+            if position == len(text):
+                return None
+            # the escaped character
+            position += 1
+            self.escape = False
+        end = ProtocolLimits._STRING_BODY.match(text, position).end()
+        if len(self.string) < self.KEY_LENGTH:
+            self.string += text[start:min(end, start + self.KEY_LENGTH)]
+        if end == len(text):
+            return None
+        if text[end] == '\\':
+            # the chunk ends between a backslash and the escaped character
+            self.escape = True
+            return None
+        self.in_string = False
+        self.last_string = self.string if len(self.string) < self.KEY_LENGTH else None
+        return end + 1
@@ -0,0 +1,164 @@
+import json
+import os
+from itertools import accumulate
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ProtocolLoadError(ValueError):
+    """
+    Raised when a containers or protocol input cannot be loaded. For JSON
+    syntax errors, offset is the byte offset of the error in the input.
+    """
+
+    def __init__(self, message, offset=None):
+        super(ProtocolLoadError, self).__init__(message)
+        self.offset = offset
+
+
+# deepest JSON nesting parse() accepts: the standard library parser
+# recurses once per level, and orjson versions without a recursion limit
+# crash the interpreter on deep input
+MAX_DEPTH = 512
+
+DICT = 'dict'
+PATH = 'path'
+RAW = 'raw'
+
+
+def resolve(source):
+    """
+    Single detection step for every supported input type. Returns a
+    (kind, value) pair where kind is one of:
+
+        DICT  -- already-parsed dict, returned as is
+        PATH  -- path of a JSON file, not yet read
+        RAW   -- JSON text as str, bytes, bytearray or memoryview
+
+    File-like objects are read here, once, and come back as RAW.
+    """
+    if isinstance(source, dict):
+        return DICT, source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return RAW, source
+    if isinstance(source, str):
+        # JSON text always starts with a structural char; anything else is
+        # taken as a path, without touching the filesystem to decide
+        stripped = source.lstrip()
+        if not stripped or stripped[0] in '{[':
+            return RAW, source
+        return PATH, source
+    if isinstance(source, os.PathLike):
+        return PATH, os.fspath(source)
+    if hasattr(source, 'read'):
+        return RAW, source.read()
+    raise ProtocolLoadError(
+        'Cannot load JSON from a {}, expected a dict, path, bytes or file object'
+        .format(type(source).__name__)
+    )
+
+
+def parse(document) -> dict:
+    """
+    Parses JSON text with orjson when it is installed, falling back to
+    the standard library json module. Both reject what orjson rejects: a
+    byte order mark, NaN and Infinity, and invalid UTF-8. Documents nested
+    deeper than MAX_DEPTH are rejected before either parser sees them.
+    """
+    if isinstance(document, memoryview):
+        document = document.tobytes()
+    if (document[:1] == '\ufeff') if isinstance(document, str) else (document[:3] == b'\xef\xbb\xbf'):
+        raise ProtocolLoadError('Invalid JSON at byte 0: byte order mark (BOM) is not supported', 0)
+    depth = _nesting_depth(document)
+    if depth > MAX_DEPTH:
+        raise ProtocolLoadError(
+            'Invalid JSON: nesting depth {} exceeds the maximum of {}'.format(depth, MAX_DEPTH)
+        )
+    try:
+        if orjson is not None:
+            data = orjson.loads(document)
+        else:
+            data = json.loads(document, parse_constant=_reject_constant)
+    except json.JSONDecodeError as error:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError; both
+        # report a character position, not a byte offset
+        offset = _byte_offset(document, error.pos)
+        raise ProtocolLoadError(
+            'Invalid JSON at byte {}: {}'.format(offset, error.msg),
+            offset
+        )
+    except UnicodeDecodeError as error:
+        # json decodes bytes as a whole, so start is a byte offset already
+        raise ProtocolLoadError(
+            'Invalid JSON at byte {}: {}'.format(error.start, error.reason),
+            error.start
+        )
+    except RecursionError:
+        raise ProtocolLoadError('Invalid JSON: nesting is too deep')
+    if not isinstance(data, dict):
+        raise ProtocolLoadError('JSON must be an object (hint: { } )')
+    return data
+
+
+def read(kind, value):
+    """
+    Returns the parsed dict for a (kind, value) pair from resolve().
+    """
+    if kind == DICT:
+        return value
+    if kind == PATH:
+        try:
+            with open(value, 'rb') as json_file:
+                value = json_file.read()
+        except OSError as error:
+            raise ProtocolLoadError(
+                'Cannot read JSON file "{}": {}'.format(value, error.strerror)
+            )
+    return parse(value)
+
+
+def load(source) -> dict:
+    """
+    Loads a dict from a dict, path, JSON str/bytes or file-like object.
+    """
+    return read(*resolve(source))
+
+
+def _reject_constant(name):
+    raise ProtocolLoadError('Invalid JSON: {} is not allowed'.format(name))
+
+
+# _nesting_depth() keeps the brackets and quotes, and maps brackets to
+# their nesting change as signed bytes
+_DELETE = bytes(char for char in range(256) if char not in b'[]{}"')
+_NESTING = bytes.maketrans(b'[]{}', b'\x01\xff\x01\xff')
+
+
+def _nesting_depth(document):
+    """
+    Deepest bracket nesting of JSON text, with bytes methods only: escaped
+    backslashes and quotes are dropped, then everything but brackets and
+    quotes, and the strings (now the odd parts between quotes) last.
+    Documents with too few brackets to go past MAX_DEPTH are not scanned,
+    and give 0.
+    """
+    if isinstance(document, str):
+        if document.count('{') + document.count('[') <= MAX_DEPTH:
+            return 0
+        document = document.encode('utf-8', 'surrogatepass')
+    elif document.count(b'{') + document.count(b'[') <= MAX_DEPTH:
+        return 0
+    structure = bytes(document).replace(b'\\\\', b'').replace(b'\\"', b'').translate(None, _DELETE)
+    brackets = b''.join(structure.split(b'"')[::2]).translate(_NESTING)
+    return max(accumulate(memoryview(brackets).cast('b')), default=0)
+
+
+def _byte_offset(document, position):
+    if isinstance(document, str):
+        text = document
+    else:
+        text = bytes(document).decode('utf-8', 'replace')
+    return len(text[:position].encode('utf-8'))
@@ -0,0 +1,217 @@
+import sys
+
+
+class Record(object):
+    """
+    Compact __slots__ record parsed from a JSON object.
+
+    FIELDS maps each known JSON key to its slot; unknown keys are kept in
+    "extra" so nothing is lost. get() reads a record like the dict it was
+    parsed from, and to_dict() turns it back into one.
+    """
+
+    __slots__ = ('extra',)
+
+    FIELDS = ()
+    # slots whose string values are interned, as they repeat throughout
+    # a protocol (container names, locations...)
+    INTERNED = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._KEYS = frozenset(key for key, slot in cls.FIELDS)
+        cls._SLOTS = dict(cls.FIELDS)
+
+    @classmethod
+    def parse(cls, data):
+        record = cls.__new__(cls)
+        if not isinstance(data, dict):
+            data = {}
+        interned = cls.INTERNED
+        nulls = None
+        for key, slot in cls.FIELDS:
+            value = data.get(key)
+            if value is None:
+                if key in data:
+                    # explicit nulls are kept in extra, for to_dict()
+                    nulls = nulls or []
+                    nulls.append(key)
+            elif slot in interned and type(value) is str:
+                value = sys.intern(value)
+            setattr(record, slot, value)
+        keys = cls._KEYS
+        extra = None
+        if not keys.issuperset(data):
+            extra = {key: value for key, value in data.items() if key not in keys}
+        if nulls:
+            extra = extra or {}
+            for key in nulls:
+                extra[key] = None
+        record.extra = extra
+        return record
+
+    def get(self, key, default=None):
+        slot = self._SLOTS.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+        elif self.extra is not None:
+            value = self.extra.get(key)
+        else:
+            value = None
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        data = {}
+        for key, slot in self.FIELDS:
+            value = getattr(self, slot)
+            if value is not None:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.to_dict())
+
+
+class Direction(Record):
+    """
+    A "from", "to" or "mix" location of an instruction command.
+    """
+
+    __slots__ = ('container', 'location', 'tip_offset', 'delay', 'touch_tip',
+                 'blowout', 'extra_pull', 'liquid_tracking', 'repetitions')
+
+    FIELDS = (
+        ('container', 'container'),
+        ('location', 'location'),
+        ('tip-offset', 'tip_offset'),
+        ('delay', 'delay'),
+        ('touch-tip', 'touch_tip'),
+        ('blowout', 'blowout'),
+        ('extra-pull', 'extra_pull'),
+        ('liquid-tracking', 'liquid_tracking'),
+        ('repetitions', 'repetitions')
+    )
+    INTERNED = ('container', 'location')
+
+
+class Tool(Record):
+    """
+    A head tool definition.
+    """
+
+    __slots__ = ('name', 'tool', 'tip_racks', 'trash_container', 'multi_channel',
+                 'axis', 'volume', 'down_plunger_speed', 'up_plunger_speed',
+                 'tip_plunge', 'extra_pull_volume', 'extra_pull_delay',
+                 'distribute_percentage', 'points')
+
+    FIELDS = (
+        ('tool', 'tool'),
+        ('tip-racks', 'tip_racks'),
+        ('trash-container', 'trash_container'),
+        ('multi-channel', 'multi_channel'),
+        ('axis', 'axis'),
+        ('volume', 'volume'),
+        ('down-plunger-speed', 'down_plunger_speed'),
+        ('up-plunger-speed', 'up_plunger_speed'),
+        ('tip-plunge', 'tip_plunge'),
+        ('extra-pull-volume', 'extra_pull_volume'),
+        ('extra-pull-delay', 'extra_pull_delay'),
+        ('distribute-percentage', 'distribute_percentage'),
+        ('points', 'points')
+    )
+    INTERNED = ('tool', 'axis')
+
+
+class DeckEntry(Record):
+    """
+    A container placed on the deck.
+    """
+
+    __slots__ = ('name', 'labware', 'slot')
+
+    FIELDS = (
+        ('labware', 'labware'),
+        ('slot', 'slot')
+    )
+    INTERNED = ('labware', 'slot')
+
+
+class _Section(object):
+    """
+    Name -> record mapping with O(1) membership tests.
+    """
+
+    __slots__ = ('records',)
+
+    RECORD = None
+
+    def __init__(self, json_data: dict):
+        records = {}
+        if isinstance(json_data, dict):
+            for name, definition in json_data.items():
+                name = sys.intern(name)
+                record = self.RECORD.parse(definition)
+                record.name = name
+                records[name] = record
+        self.records = records
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def items(self):
+        return self.records.items()
+
+    def get(self, key, default=None):
+        return self.records.get(key, default)
+
+    def to_dict(self) -> dict:
+        return {name: record.to_dict() for name, record in self.records.items()}
+
+
+class Head(_Section):
+    __slots__ = ()
+    RECORD = Tool
+
+
+class Deck(_Section):
+    __slots__ = ()
+    RECORD = DeckEntry
+
+    def labware(self, key):
+        entry = self.records.get(key)
+        return None if entry is None else entry.labware
+
+
+class Protocol(object):
+    """
+    Typed protocol model, parsed in one pass from the protocol JSON.
+
+    Head and deck are parsed into records. Instructions are kept as they
+    are, and their directions read as dicts: copying every move and
+    parsing every direction into a record up front made loading slower
+    than the lookups it saved.
+    """
+
+    __slots__ = ('sections', 'info', 'head', 'deck', 'ingredients', 'instructions')
+
+    def __init__(self, json_data: dict):
+        self.sections = frozenset(json_data)
+        self.info = json_data.get('info', {})
+        self.head = Head(json_data.get('head', {}))
+        self.deck = Deck(json_data.get('deck', {}))
+        self.ingredients = json_data.get('ingredients', {})
+        self.instructions = json_data.get('instructions', [])
+
+    def __contains__(self, key):
+        return key in self.sections
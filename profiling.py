@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# tracemalloc is process-wide: profilers running in several threads share
+# one trace, started by the first and stopped by the last of them (unless
+# something else was already tracing)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+class Profiler(object):
+    """
+    Collects per-phase wall/CPU time, hot-path call counts, per-rule time
+    and peak allocation for a single validation run.
+
+    Phases nest, so "validate;validate_instructions;transfer" is the
+    time spent validating transfer groups. The peak allocation is
+    process-wide, so it includes concurrently profiled runs.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = {}
+        self.rules = {}
+        self.peak_allocation = None
+        self._stack = []
+
+    def start(self):
+        global _tracing_users, _tracing_started
+        if self.trace_memory:
+            with _tracing_lock:
+                if _tracing_users == 0:
+                    if tracemalloc.is_tracing():
+                        tracemalloc.reset_peak()
+                    else:
+                        tracemalloc.start()
+                        _tracing_started = True
+                _tracing_users += 1
+
+    def stop(self):
+        global _tracing_users, _tracing_started
+        if self.trace_memory:
+            with _tracing_lock:
+                self.peak_allocation = tracemalloc.get_traced_memory()[1]
+                _tracing_users -= 1
+                if _tracing_users == 0 and _tracing_started:
+                    tracemalloc.stop()
+                    _tracing_started = False
+
+    @contextmanager
+    def phase(self, name):
+        self._stack.append(name)
+        path = ';'.join(self._stack)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.phases.get(path)
+            if stats is None:
+                stats = self.phases[path] = {'calls': 0, 'wall': 0.0, 'cpu': 0.0}
+            stats['calls'] += 1
+            stats['wall'] += time.perf_counter() - wall
+            stats['cpu'] += time.process_time() - cpu
+            self._stack.pop()
+
+    def count(self, name, number=1):
+        self.counters[name] = self.counters.get(name, 0) + number
+
+    def rule(self, name, seconds):
+        stats = self.rules.get(name)
+        if stats is None:
+            stats = self.rules[name] = {'calls': 0, 'wall': 0.0}
+        stats['calls'] += 1
+        stats['wall'] += seconds
+
+    def report(self) -> dict:
+        return {
+            'phases': {path: dict(stats) for path, stats in self.phases.items()},
+            'counters': dict(self.counters),
+            'rules': {name: dict(stats) for name, stats in self.rules.items()},
+            'peak_allocation': self.peak_allocation
+        }
+
+
+def to_json(report, **kwargs) -> str:
+    """
+    Serializes a profiling report as JSON.
+    """
+    return json.dumps(report, sort_keys=True, **kwargs)
+
+
+def to_collapsed(report) -> str:
+    """
+    Renders a profiling report in the collapsed-stack format read by
+    flamegraph.pl and speedscope: one "a;b;c <self microseconds>" line
+    per phase.
+    """
+    phases = report.get('phases', {})
+    self_wall = {path: stats['wall'] for path, stats in phases.items()}
+    for path, stats in phases.items():
+        parent = path.rpartition(';')[0]
+        if parent in self_wall:
+            self_wall[parent] -= stats['wall']
+    return '\n'.join(
+        '{} {}'.format(path, max(int(round(wall * 1e6)), 0))
+        for path, wall in sorted(self_wall.items())
+    )
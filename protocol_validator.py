@@ -1,6 +1,18 @@
 import json
-import os
-import sys
+
+from . import loader
+from .canonical import expand, is_compact
+from .calibration import CalibrationCurve, CalibrationTable
+from .capacity import CapacityTable
+from .catalog import diff_catalogs, lint_catalog
+from .deck_layout import check_layouts
+from .estimator import RunTimeEstimator
+from .limits import ProtocolLimits
+from .model import Deck, Head, Protocol
+from .profiling import Profiler
+from .rules import default_registry, RuleRegistry
+from .schema import structural_messages
+from .summary import MessageSummary
 
 class Containers(object):
     def __init__(self, json_data: dict):
@@ -11,39 +23,117 @@ class Containers(object):
 
     def has_location(self, labware: str, location: str):
         container = self.data.get('containers', {}).get(labware)
+        if container is None:
+            return False
         return location in container.get('locations', {})
 
+    def location(self, labware: str, location: str):
+        """
+        Returns a location's definition (x, y, z, total-liquid-volume...)
+        or None
+        """
+        container = self.data.get('containers', {}).get(labware)
+        if container is None:
+            return None
+        return container.get('locations', {}).get(location)
 
-class Head(object):
-    def __init__(self, json_data: dict):
-        self.data = json_data
-        #print('Head initiated')
-        #print('head: ',json.dumps(self.data, indent=1))
+    def entries(self, labware_names) -> list:
+        """
+        Returns the definitions of the given labware, None where missing
+        """
+        containers = self.data.get('containers', {})
+        return [containers.get(labware) for labware in labware_names]
 
-    def __contains__(self, key):
-        return key in list(self.data.keys())
+    def lint(self) -> dict:
+        """
+        Checks the catalog itself, see CatalogLinter
+        """
+        return lint_catalog(self.data)
 
+    def diff(self, other: "Containers") -> dict:
+        """
+        Structural difference from this catalog to another, see diff_catalogs
+        """
+        return diff_catalogs(self.data, other.data)
 
-class Deck(object):
-    def __init__(self, json_data: dict):
-        self.data = json_data
-        #print('Deck initiated')
-        #print('deck: ',json.dumps(self.data, indent=1))
 
-    def __contains__(self, key):
-        return key in list(self.data.keys())
+class CatalogCheck(object):
+    """
+    Stands, in a recorded message list, for the messages of a check that
+    reads the containers catalog: check(containers, *args) returns them.
+    """
 
+    __slots__ = ('check', 'args')
 
-class Protocol(object):
-    def __init__(self, json_data: dict):
-        self.data = json_data
-        #print('inside Protocol init')
-        #print('protocol data: ', json.dumps(self.data, indent=1))
-        self.head = Head(self.data.get('head', {}))
-        self.deck = Deck(self.data.get('deck', {}))
+    def __init__(self, check, args):
+        self.check = check
+        self.args = args
+
+    def messages(self, containers: Containers) -> list:
+        return self.check(containers, *self.args)
 
-    def __contains__(self, key):
-        return key in list(self.data.keys())
+
+def resolve_catalog_checks(message: dict, containers: Containers) -> dict:
+    """
+    Returns a copy of a message recorded by
+    JSONProtocolValidator.record_catalog_checks(), with its catalog checks
+    replaced by their messages for the given catalog
+    """
+    resolved = dict(message)
+    for kind in ('errors', 'warnings'):
+        messages = []
+        for item in message[kind]:
+            if type(item) is CatalogCheck:
+                messages.extend(item.messages(containers))
+            else:
+                messages.append(item)
+        resolved[kind] = messages
+    return resolved
+
+
+def _labware_errors(containers, container_name, labware, slot, slots):
+    if labware not in containers:
+        return [
+            'Deck container "{}"\'s labware "{}" was not found in containers data'
+            .format(container_name, labware)
+        ]
+    if slot and slot not in slots:
+        return [
+            'Deck container "{}"\'s "slot" {} not a slot on Deck, MUST be one of {}'
+            .format(container_name, slot, slots)
+        ]
+    return []
+
+
+def _ingredient_location_errors(containers, ingredient_name, container, location, labware):
+    if labware in containers and not containers.has_location(labware, location):
+        return [
+            'Ingredient "{}" container "{}" location "{}" not found in "{}"'
+            .format(ingredient_name, container, location, labware)
+        ]
+    return []
+
+
+def _direction_location_errors(containers, command_name, direction, container, location, labware,
+                               instruction_number, group_number, command_number):
+    if not containers.has_location(labware, location):
+        return [
+            'Instruction {} "{}" container "{}" location "{}" not found in "{}", at instruction number {}, group number {}, command number {}'
+            .format(command_name, direction, container, location, labware, instruction_number, group_number, command_number)
+        ]
+    return []
+
+
+def _overflow_warnings(containers, command_name, volume, container, location, labware,
+                       instruction_number, group_number, command_number):
+    well = containers.location(labware, location) if labware else None
+    well_volume = well.get('total-liquid-volume') if well else None
+    if isinstance(well_volume, (int, float)) and volume > well_volume:
+        return [
+            'Instructions {} volume {} overflows container "{}" location "{}" which holds {}, at instruction number {}, group number {}, command number {}'
+            .format(command_name, volume, container, location, well_volume, instruction_number, group_number, command_number)
+        ]
+    return []
 
 
 class JSONProtocolValidator(object):
@@ -62,42 +152,59 @@ class JSONProtocolValidator(object):
     ]
 
 
-    def __init__(self, containers='', protocol=''):
+    def __init__(self, containers='', protocol='', limits: ProtocolLimits=None, registry: RuleRegistry=None):
         self.containers = None
         self.protocol = None
+        self.profiler = None
+        self.summary = None
+        self.recording = False
+        self.registry = default_registry if registry is None else registry
+        self.rules = self.registry.dispatch()
+        self.load_messages = {'errors': [], 'warnings': []}
+        self.structure_messages = {'errors': [], 'warnings': []}
         try:
-            # 1. check if dictionary to load object directly
-            if isinstance(containers, dict):
-                self.containers = Containers(containers)
-            # 2. otherwise, check if filepath to load from file
-            elif os.path.exists(os.path.dirname(containers)):
-                with open(containers) as containers_json:
-                    self.containers = Containers(json.load(containers_json))
-            # 3. otherwise, try loading directly from data entered as string
-            else:
-                self.containers = Containers(json.loads(containers))
-
-            # 1. check if dictionary to load object directly
-            if isinstance(protocol, dict):
-                print('protocol is dict')
-                self.protocol = Protocol(protocol)
-            # 2. otherwise, check if filepath to load from file
-            elif os.path.exists(os.path.dirname(protocol)):
-                print('protocol is json file')
-                with open(protocol) as protocol_json:
-                    self.protocol = Protocol(json.load(protocol_json))
-            # 3. otherwise, try loading directly from data entered as string
+            if isinstance(containers, Containers):
+                # already loaded, e.g. shared by a ProtocolValidator
+                self.containers = containers
             else:
-                print('protocol is string')
-                self.protocol = Protocol(json.loads(protocol))
-        except:
-            print(sys.exc_info()[0]) # TODO: log this instead of print
+                self.containers = Containers(loader.load(containers))
+        except loader.ProtocolLoadError as error:
+            self.load_messages['errors'].append(
+                'Containers JSON could not be loaded: {}'.format(error)
+            )
+        try:
+            protocol_kind, protocol_source = loader.resolve(protocol)
+            if limits is not None:
+                # reject oversized protocols before they are fully loaded
+                limit_messages = limits.check_resolved(protocol_kind, protocol_source)
+                if limit_messages.get('errors'):
+                    self.load_messages['errors'].extend(limit_messages.get('errors'))
+                    return
+            protocol_data = loader.read(protocol_kind, protocol_source)
+            if is_compact(protocol_data):
+                # compact protocols share their repeated directions; the
+                # limits were checked on the compact text, so the expanded
+                # size is bounded before expanding and the rest checked after
+                protocol_data = expand(protocol_data, None if limits is None else limits.max_bytes)
+                if limits is not None:
+                    limit_messages = limits.check_resolved(loader.DICT, protocol_data)
+                    if limit_messages.get('errors'):
+                        self.load_messages['errors'].extend(limit_messages.get('errors'))
+                        return
+            # structural first pass, while the raw data is at hand
+            self.structure_messages = structural_messages(protocol_data)
+            self.protocol = Protocol(protocol_data)
+        except loader.ProtocolLoadError as error:
+            self.load_messages['errors'].append(
+                'Protocol JSON could not be loaded: {}'.format(error)
+            )
             return
-        #print('inside JSONProtocolValidator init')
         self.head = self.protocol.head
         self.deck = self.protocol.deck
-        #print('head data: ', json.dumps(self.head.data))
-        #print('deck data: ', json.dumps(self.deck.data))
+        self.capacity = CapacityTable(self.head)
+        self.calibration = CalibrationTable(self.head)
+        self.aspiration_count = 0
+        self.aspirated_volumes = {}
 
 
     def ensure_main_sections(self):
@@ -121,9 +228,100 @@ class JSONProtocolValidator(object):
         return messages
 
 
-    def validate(self) -> list:
+    def validate(self, profile=False, summary=None, rules=None) -> list:
         """Entry method
+
+        With profile=True the result carries a "profile" report of
+        per-phase timings, hot-path counters, per-rule time and peak
+        allocation.
+
+        With summary=K, messages are aggregated as they are produced (see
+        MessageSummary): "errors" and "warnings" hold one message per group
+        and "summary" the groups, with counts and their first K locations.
+
+        rules ({rule name: bool}) enables or disables registry rules for
+        this call only.
         """
+        if summary is not None:
+            self.summary = MessageSummary(max_locations=summary)
+            try:
+                message = self.validate(profile, rules=rules)
+                # early returns skip the streaming collection
+                self.summary.extend(message)
+                message.update(self.summary.messages())
+            finally:
+                self.summary = None
+            return message
+
+        if not profile:
+            self.rules = self.registry.dispatch(rules)
+            return self._validate()
+
+        self.profiler = Profiler()
+        self.rules = self.registry.dispatch(rules, self.profiler)
+        self.profiler.start()
+        try:
+            with self.profiler.phase('validate'):
+                message = self._validate()
+        finally:
+            self.profiler.stop()
+        message['profile'] = self.profiler.report()
+        self.profiler = None
+        return message
+
+
+    def _phase(self, name, validator, *args):
+        if self.profiler is None:
+            return self._collect(validator(*args))
+        with self.profiler.phase(name):
+            return self._collect(validator(*args))
+
+
+    def _apply_rules(self, checks, errors, warnings, *args):
+        for check in checks:
+            messages = check(self, *args)
+            if messages:
+                errors.extend(messages.get('errors') or ())
+                warnings.extend(messages.get('warnings') or ())
+
+
+    def _catalog_check(self, messages, check, *args):
+        """
+        Adds the messages of a check that reads the containers catalog or,
+        while recording, a CatalogCheck standing for them
+        """
+        if self.recording:
+            messages.append(CatalogCheck(check, args))
+        else:
+            messages.extend(check(self.containers, *args))
+
+
+    def _collect(self, messages):
+        """
+        In summary mode, hands messages over to the summary as soon as they
+        are produced, so they are not accumulated
+        """
+        if self.summary is None:
+            return messages
+        self.summary.extend(messages)
+        return {'errors': [], 'warnings': []}
+
+
+    def _flush(self, errors, warnings):
+        """
+        In summary mode, hands the messages gathered so far over to the
+        summary and empties the lists; called for every command of a group,
+        so long groups are not accumulated either
+        """
+        if self.summary is not None and (errors or warnings):
+            self.summary.extend({'errors': errors, 'warnings': warnings})
+            del errors[:]
+            del warnings[:]
+
+
+    def _validate(self) -> dict:
+        self.aspiration_count = 0
+        self.aspirated_volumes = {}
         errors = []
         warnings = []
         messages = {
@@ -133,36 +331,48 @@ class JSONProtocolValidator(object):
             'warnings': warnings
         }
 
+        if self.load_messages.get('errors'):
+            messages['errors'].extend(self.load_messages.get('errors'))
+            return messages
+
         main_section_errors = self.ensure_main_sections()
         if main_section_errors.get('errors'):
             messages['errors'].extend(main_section_errors.get('errors'))
             return messages
 
-        info_dict = self.protocol.data.get('info',{})
+        # malformed protocols skip the semantic passes
+        if self.structure_messages.get('errors'):
+            messages['errors'].extend(self.structure_messages.get('errors'))
+            return messages
+
+        info_dict = self.protocol.info
         info_message = None
         if info_dict:
             info_message = json.dumps(info_dict)
 
-        no_containers = len(list(self.deck.data.keys()))
-        no_tools = len(list(self.head.data.keys()))
-        instructions_list = self.protocol.data.get('instructions', [])
+        no_containers = len(self.deck)
+        no_tools = len(self.head)
+        instructions_list = self.protocol.instructions
         no_instructions = len(instructions_list)
 
-        head_data = self.protocol.data.get('head', {})
-        deck_data = self.protocol.data.get('deck', {})
-        ingredients_data = self.protocol.data.get('ingredients', {})
+        head_data = self.head
+        deck_data = self.deck
+        ingredients_data = self.protocol.ingredients
 
 
-        deck_messages = self.validate_deck(deck_data)
-        head_messages = self.validate_head(head_data)
-        ingredients_messages = self.validate_ingredients(ingredients_data)
-        instructions_messages = self.validate_instructions(instructions_list)
+        deck_messages = self._phase('validate_deck', self.validate_deck, deck_data)
+        head_messages = self._phase('validate_head', self.validate_head, head_data)
+        ingredients_messages = self._phase('validate_ingredients', self.validate_ingredients, ingredients_data)
+        instructions_messages = self._phase('validate_instructions', self.validate_instructions, instructions_list)
+        protocol_messages = self._phase('validate_protocol', self.validate_protocol)
+        main_section_errors = self._collect(main_section_errors)
 
         warnings = sum([
             deck_messages.get('warnings'),
             head_messages.get('warnings'),
             ingredients_messages.get('warnings'),
             instructions_messages.get('warnings'),
+            protocol_messages.get('warnings'),
             main_section_errors.get('warnings')
         ], [])
 
@@ -171,11 +381,12 @@ class JSONProtocolValidator(object):
             head_messages.get('errors'),
             ingredients_messages.get('errors'),
             instructions_messages.get('errors'),
+            protocol_messages.get('errors'),
         ], [])
 
         message = {
             'info': info_message,
-            'salient': {'no_containers':no_containers, 'no_tools':no_tools, 'no_instructions':no_instructions},
+            'salient': {'no_containers':no_containers, 'no_tools':no_tools, 'no_instructions':no_instructions, 'no_aspirations':self.aspiration_count},
             'errors': errors,
             'warnings': warnings
         }
@@ -183,6 +394,43 @@ class JSONProtocolValidator(object):
         return message
 
 
+    def record_catalog_checks(self, rules=None) -> dict:
+        """
+        Validates the protocol, leaving the checks that read the containers
+        catalog (deck labware, direction and ingredient locations, well
+        overflow) as CatalogCheck items of the errors and warnings, which
+        resolve_catalog_checks() turns into the messages of any catalog
+        """
+        self.recording = True
+        try:
+            return self.validate(rules=rules)
+        finally:
+            self.recording = False
+
+
+    def referenced_labware(self) -> list:
+        """
+        Labware of the deck, sorted: the only catalog entries the
+        validation reads
+        """
+        if self.protocol is None:
+            return []
+        return sorted(set(
+            entry.labware for entry in self.deck.records.values()
+            if isinstance(entry.labware, str)
+        ))
+
+
+    def estimate_runtime(self, **constants) -> dict:
+        """
+        Estimates the protocol run time, see RunTimeEstimator; returns None
+        when the protocol could not be loaded
+        """
+        if self.protocol is None or self.containers is None:
+            return None
+        return RunTimeEstimator(self.protocol, self.containers, **constants).estimate()
+
+
     def validate_head(self, head_data) -> dict:
         """
         Verifies that head is properly defined.
@@ -191,20 +439,26 @@ class JSONProtocolValidator(object):
         errors = []
         warnings = []
 
+        if not isinstance(head_data, Head):
+            head_data = Head(head_data)
+
+        tool_checks = self.rules['tool']
         for tool_name, tool_definition in head_data.items():
-            tool = tool_definition.get('tool')
-            tip_racks = tool_definition.get('tip-racks')
-            trash_container = tool_definition.get('trash-container')
-            multi_channel = tool_definition.get('multi-channel')
-            axis = tool_definition.get('axis')
-            volume = tool_definition.get('volume')
-            down_plunger_speed = tool_definition.get('down-plunger-speed')
-            up_plunger_speed = tool_definition.get('up-plunger-speed')
-            tip_plunge = tool_definition.get('tip-plunge')
-            extra_pull_volume = tool_definition.get('extra-pull-volume')
-            extra_pull_delay = tool_definition.get('extra-pull-delay')
-            distribute_percentage = tool_definition.get('distribute-percentage')
-            points = tool_definition.get('points')
+            if tool_checks:
+                self._apply_rules(tool_checks, errors, warnings, tool_name, tool_definition)
+            tool = tool_definition.tool
+            tip_racks = tool_definition.tip_racks
+            trash_container = tool_definition.trash_container
+            multi_channel = tool_definition.multi_channel
+            axis = tool_definition.axis
+            volume = tool_definition.volume
+            down_plunger_speed = tool_definition.down_plunger_speed
+            up_plunger_speed = tool_definition.up_plunger_speed
+            tip_plunge = tool_definition.tip_plunge
+            extra_pull_volume = tool_definition.extra_pull_volume
+            extra_pull_delay = tool_definition.extra_pull_delay
+            distribute_percentage = tool_definition.distribute_percentage
+            points = tool_definition.points
 
             tool_belt = [
                 ('tool',tool),
@@ -351,6 +605,13 @@ class JSONProtocolValidator(object):
                     'Head tool "{}"\'s "distribute-percentage" MUST be between 0.0 and 1.0'
                     .format(tool_name)
                 )
+            # capacity left for liquid
+            capacities = CapacityTable.tool_capacity(tool_definition)
+            if capacities is not None and min(capacities) <= 0:
+                errors.append(
+                    'Head tool "{}"\'s "extra-pull-volume" and "distribute-percentage" leave no room for liquid in its "volume"'
+                    .format(tool_name)
+                )
             # points
             if not isinstance(points, list):
                 errors.append(
@@ -367,7 +628,7 @@ class JSONProtocolValidator(object):
                     if f1 is None or f2 is None:
                         errors.append(
                             'Head tool "{}"\'s "points" point number {} MUST define both an f1 and f2'
-                            .append(tool_name, point_number)
+                            .format(tool_name, point_number)
                         )
                         continue
                     # f1
@@ -392,6 +653,16 @@ class JSONProtocolValidator(object):
                             'Head tool "{}"\'s "points" point number {} "f2" is outside normal values'
                             .format(tool_name, point_number)
                         )
+                # the points as a whole MUST form a monotonic curve
+                if all(
+                    isinstance(point, dict) and isinstance(point.get('f1'), (int, float)) and isinstance(point.get('f2'), (int, float))
+                    for point in points
+                ):
+                    for problem in CalibrationCurve.check(points):
+                        errors.append(
+                            'Head tool "{}"\'s "points" {}'
+                            .format(tool_name, problem)
+                        )
 
         messages = {'errors': errors, 'warnings': warnings}
         return messages
@@ -406,9 +677,15 @@ class JSONProtocolValidator(object):
         errors = []
         warnings = []
 
+        if not isinstance(deck_data, Deck):
+            deck_data = Deck(deck_data)
+
+        deck_checks = self.rules['deck']
         for container_name, container_definition in deck_data.items():
-            labware = container_definition.get('labware')
-            slot = container_definition.get('slot')
+            if deck_checks:
+                self._apply_rules(deck_checks, errors, warnings, container_name, container_definition)
+            labware = container_definition.labware
+            slot = container_definition.slot
 
             if labware is None:
                 errors.append(
@@ -416,28 +693,21 @@ class JSONProtocolValidator(object):
                     .format(container_name)
                 )
                 continue
-            if slot is None:
-                warnings.append(
-                    'Deck container "{}" does not specify a "slot" attribute, but it is recommended'
-                    .format(container_name)
-                )
 
-            if labware not in self.containers:
-                errors.append(
-                    'Deck container "{}"\'s labware "{}" was not found in containers data'
-                    .format(container_name, labware)
-                )
-            else:
-                if slot and slot not in self.DECK_SLOTS:
-                    errors.append(
-                        'Deck container "{}"\'s "slot" {} not a slot on Deck, MUST be one of {}'
-                        .format(container_name, slot, self.DECK_SLOTS)
-                    )
+            self._catalog_check(errors, _labware_errors, container_name, labware, slot, self.DECK_SLOTS)
+
         messages = {'errors': errors, 'warnings': warnings}
         return messages
 
 
-    def validate_ingredients(self, ingredients_data) -> list:
+    def validate_layouts(self, decks) -> list:
+        """
+        Verifies the slot layout of many decks in bulk
+        """
+        return check_layouts(decks, self.DECK_SLOTS)
+
+
+    def validate_ingredients(self, ingredients_data) -> dict:
         """
         Verifies that the ingredients section is properly defined
         """
@@ -445,10 +715,50 @@ class JSONProtocolValidator(object):
         errors = []
         warnings = []
 
-        if ingredients_data:
-            warnings.append(
-                'Ingredients has elements, but Ingredients are not yet supported'
+        if not isinstance(ingredients_data, dict):
+            errors.append(
+                'Ingredients MUST be a JSON object (hint: { } )'
             )
+            return {'errors': errors, 'warnings': warnings}
+
+        for ingredient_name, placements in ingredients_data.items():
+            if not isinstance(placements, list):
+                errors.append(
+                    'Ingredient "{}" MUST be a JSON array of container locations (hint: [ ] )'
+                    .format(ingredient_name)
+                )
+                continue
+            placement_number = 0
+            for placement in placements:
+                placement_number += 1
+                if not isinstance(placement, dict):
+                    errors.append(
+                        'Ingredient "{}" placement number {} MUST be a JSON object (hint: {{ }} )'
+                        .format(ingredient_name, placement_number)
+                    )
+                    continue
+                container = placement.get('container')
+                location = placement.get('location')
+                volume = placement.get('volume')
+                if container is None or location is None:
+                    errors.append(
+                        'Ingredient "{}" placement number {} MUST define a "container" and "location"'
+                        .format(ingredient_name, placement_number)
+                    )
+                    continue
+                if container not in self.deck:
+                    errors.append(
+                        'Ingredient "{}" container "{}" not found in Deck'
+                        .format(ingredient_name, container)
+                    )
+                else:
+                    labware = self.deck.labware(container)
+                    self._catalog_check(errors, _ingredient_location_errors, ingredient_name, container, location, labware)
+                if volume is not None and (not isinstance(volume, (int, float)) or volume < 0):
+                    errors.append(
+                        'Ingredient "{}" placement number {} "volume" MUST be a positive int or float'
+                        .format(ingredient_name, placement_number)
+                    )
 
         messages = {'errors': errors, 'warnings': warnings}
         return messages
@@ -470,7 +780,7 @@ class JSONProtocolValidator(object):
         instruction_number = 0
         for instruction in instructions_data:
             instruction_number += 1
-            instruction_message = self.validate_instruction(instruction, instruction_number)
+            instruction_message = self._collect(self.validate_instruction(instruction, instruction_number))
             errors.extend(instruction_message.get('errors'))
             warnings.extend(instruction_message.get('warnings'))
 
@@ -512,15 +822,20 @@ class JSONProtocolValidator(object):
                 group_number = 0
                 for group in groups:
                     group_number +=1
-                    group_messages = self.validate_group(group, instruction_number, group_number)
+                    self._flush(errors, warnings)
+                    group_messages = self._collect(self.validate_group(group, instruction_number, group_number, tool))
                     errors.extend(group_messages.get('errors'))
                     warnings.extend(group_messages.get('warnings'))
 
+        instruction_checks = self.rules['instruction']
+        if instruction_checks:
+            self._apply_rules(instruction_checks, errors, warnings, instruction, instruction_number)
+
         messages = {'errors': errors, 'warnings': warnings}
         return messages
 
 # INSTRUCTIONS -> Instruction -> Group
-    def validate_group(self, group, instruction_number, group_number) -> dict:
+    def validate_group(self, group, instruction_number, group_number, tool=None) -> dict:
         errors = []
         warnings = []
 
@@ -531,34 +846,46 @@ class JSONProtocolValidator(object):
             )
         else:
             command_name, command_value = list(group.items())[0]
-            # Originally written for Transfer
-            # Transfer -> [{to:{},from:{},volume:int,float}]
-            # Distribute -> {from:{},[to's]}
-            # Consolidate -> {to:{},[from's]}
-            # Mix -> [{mix}]
-            if command_name == self.COMMAND_TYPES[0]: # Transfer
-                command_messages = self.validate_transfer(command_value, instruction_number, group_number)
-            elif command_name == self.COMMAND_TYPES[1]: # Distribute
-                command_messages = self.validate_dist_cons(command_value, instruction_number, group_number)
-            elif command_name == self.COMMAND_TYPES[2]: # Consolidate
-                command_messages = self.validate_dist_cons(command_value, instruction_number, group_number, False)
-            elif command_name == self.COMMAND_TYPES[3]: # Mix
-                command_messages = self.validate_mix(command_value, instruction_number, group_number)
-            else:
-                errors.append(
-                    'Instructions command MUST be one of {}, at instruction number {}, group number {}'
-                    .format(self.COMMAND_TYPES, instruction_number, group_number)
-                )
+            if self.profiler is not None:
+                with self.profiler.phase(command_name):
+                    return self._validate_command(command_name, command_value, instruction_number, group_number, tool)
+            return self._validate_command(command_name, command_value, instruction_number, group_number, tool)
 
+        messages = {'errors': errors, 'warnings': warnings}
+        return messages
+
+
+    def _validate_command(self, command_name, command_value, instruction_number, group_number, tool=None) -> dict:
+        errors = []
+        warnings = []
+        # Originally written for Transfer
+        # Transfer -> [{to:{},from:{},volume:int,float}]
+        # Distribute -> {from:{},[to's]}
+        # Consolidate -> {to:{},[from's]}
+        # Mix -> [{mix}]
+        if command_name == self.COMMAND_TYPES[0]: # Transfer
+            command_messages = self.validate_transfer(command_value, instruction_number, group_number, tool)
+        elif command_name == self.COMMAND_TYPES[1]: # Distribute
+            command_messages = self.validate_dist_cons(command_value, instruction_number, group_number, True, tool)
+        elif command_name == self.COMMAND_TYPES[2]: # Consolidate
+            command_messages = self.validate_dist_cons(command_value, instruction_number, group_number, False, tool)
+        elif command_name == self.COMMAND_TYPES[3]: # Mix
+            command_messages = self.validate_mix(command_value, instruction_number, group_number)
+        else:
+            command_messages = {'errors': [], 'warnings': []}
+            errors.append(
+                'Instructions command MUST be one of {}, at instruction number {}, group number {}'
+                .format(self.COMMAND_TYPES, instruction_number, group_number)
+            )
 
-            errors.extend(command_messages.get('errors'))
-            warnings.extend(command_messages.get('warnings'))
+        errors.extend(command_messages.get('errors'))
+        warnings.extend(command_messages.get('warnings'))
 
         messages = {'errors': errors, 'warnings': warnings}
         return messages
 
 
-    def validate_transfer(self, command_value, instruction_number, group_number) -> dict:
+    def validate_transfer(self, command_value, instruction_number, group_number, tool=None) -> dict:
         errors = []
         warnings = []
         if not isinstance(command_value, list):
@@ -570,6 +897,7 @@ class JSONProtocolValidator(object):
             command_number = 0
             for command in command_value:
                 command_number += 1
+                self._flush(errors, warnings)
                 command_from = command.get('from', {})
                 command_to = command.get('to', {})
                 volume = command.get('volume')
@@ -581,7 +909,7 @@ class JSONProtocolValidator(object):
                     )
                 else:
                     from_messages = self.validate_direction('from', command_from, instruction_number, group_number, 'Transfer', command_number)
-                    to_messages = self.validate_direction('to', command_from, instruction_number, group_number, 'Transfer', command_number)
+                    to_messages = self.validate_direction('to', command_to, instruction_number, group_number, 'Transfer', command_number)
 
                     errors.extend(sum([
                         from_messages.get('errors'),
@@ -603,12 +931,15 @@ class JSONProtocolValidator(object):
                             'Instructions Transfer "volume" {} is  awfully high..., at instruction number {}, group number {}, command number {}'
                             .format(volume, instruction_number, group_number, command_number)
                         )
+                    # capacity
+                    self._apply_rules(self.rules['aspiration'], errors, warnings, 'Transfer', tool, volume, False, instruction_number, group_number, command_number)
+                    self._apply_rules(self.rules['dispense'], errors, warnings, 'Transfer', command_to, volume, instruction_number, group_number, command_number)
 
         messages = {'errors': errors, 'warnings': warnings}
         return messages
 
 
-    def validate_dist_cons(self, command_value, instruction_number, group_number, dist_or_cons=True) -> dict:
+    def validate_dist_cons(self, command_value, instruction_number, group_number, dist_or_cons=True, tool=None) -> dict:
         errors = []
         warnings = []
         dist_cons = 'Distribute'
@@ -659,19 +990,113 @@ class JSONProtocolValidator(object):
                     direction_number = 0
                     for direction in direction_list:
                         direction_number += 1
+                        self._flush(errors, warnings)
                         direction_messages = self.validate_direction(list_label, direction, instruction_number, group_number, dist_cons, direction_number)
                         errors.extend(direction_messages.get('errors'))
                         warnings.extend(direction_messages.get('warnings'))
 
+                    # capacity, from the "volume" of each listed direction
+                    volumes = []
+                    direction_number = 0
+                    for direction in direction_list:
+                        direction_number += 1
+                        self._flush(errors, warnings)
+                        volume = direction.get('volume') if isinstance(direction, dict) else None
+                        if not isinstance(volume, (int, float)) or isinstance(volume, bool):
+                            continue
+                        volumes.append(volume)
+                        if dist_or_cons:
+                            self._apply_rules(self.rules['dispense'], errors, warnings, dist_cons, direction, volume, instruction_number, group_number, direction_number)
+                    if volumes:
+                        self._apply_rules(self.rules['aspiration'], errors, warnings, dist_cons, tool, sum(volumes), dist_or_cons, instruction_number, group_number, 'n/a')
+                        if not dist_or_cons:
+                            self._apply_rules(self.rules['dispense'], errors, warnings, dist_cons, single_direction, sum(volumes), instruction_number, group_number, 'n/a')
+
                 if blowout != True and blowout != False:
                     errors.append(
                         'Instruction {} "blowout" MUST be "true" or "false", at instruction number {}, group number {}'
-                        .format(dist_const, instruction_number, group_number)
+                        .format(dist_cons, instruction_number, group_number)
                     )
         messages = {'errors': errors, 'warnings': warnings}
         return messages
 
 
+    def validate_capacity(self, command_name, tool, volume, distribute, instruction_number, group_number, command_number) -> dict:
+        """
+        Counts the aspirations a volume takes with the instruction's tool,
+        warning when it has to be split
+        """
+        errors = []
+        warnings = []
+        aspirations = None
+        if tool is not None:
+            aspirations = self.capacity.aspirations(tool, volume, distribute)
+        if aspirations is not None:
+            self.aspiration_count += aspirations
+            self.aspirated_volumes.setdefault(tool, []).append(volume / aspirations)
+            if aspirations > 1:
+                warnings.append(
+                    'Instructions {} volume {} exceeds tool "{}" capacity of {}, it takes {} aspirations, at instruction number {}, group number {}, command number {}'
+                    .format(command_name, volume, tool, self.capacity.capacity(tool, distribute), aspirations, instruction_number, group_number, command_number)
+                )
+        messages = {'errors': errors, 'warnings': warnings}
+        return messages
+
+
+    def validate_protocol(self) -> dict:
+        """
+        Runs the protocol-wide rules (deck layout, ingredient tracking,
+        calibration range...) once the instructions are validated
+        """
+        errors = []
+        warnings = []
+        self._apply_rules(self.rules['protocol'], errors, warnings, self.protocol)
+        messages = {'errors': errors, 'warnings': warnings}
+        return messages
+
+
+    def validate_calibration(self) -> dict:
+        """
+        Converts every aspirated volume to a plunger position through its
+        tool's calibration curve, in one batch per tool, and warns once per
+        tool about volumes outside the calibrated points
+        """
+        errors = []
+        warnings = []
+        for tool, volumes in self.aspirated_volumes.items():
+            curve = self.calibration.curves.get(tool)
+            if curve is None:
+                continue
+            outside = [
+                volume
+                for volume, position in zip(volumes, curve.positions(volumes))
+                if not curve.in_range(position)
+            ]
+            if outside:
+                warnings.append(
+                    'Head tool "{}" aspirates {} volumes (from {} to {}) outside its calibrated "points", their plunger positions are extrapolated'
+                    .format(tool, len(outside), min(outside), max(outside))
+                )
+        messages = {'errors': errors, 'warnings': warnings}
+        return messages
+
+
+    def validate_destination(self, command_name, destination, volume, instruction_number, group_number, command_number) -> dict:
+        """
+        Verifies that a dispensed volume fits in the destination well
+        """
+        errors = []
+        warnings = []
+        if isinstance(destination, dict) and isinstance(volume, (int, float)):
+            container = destination.get('container')
+            location = destination.get('location')
+            labware = self.deck.labware(container)
+            self._catalog_check(warnings, _overflow_warnings, command_name, volume, container, location, labware,
+                                instruction_number, group_number, command_number)
+        messages = {'errors': errors, 'warnings': warnings}
+        return messages
+
+
     def validate_mix(self, mix_list, instruction_number, group_number) -> dict:
         errors = []
         warnings = []
@@ -684,6 +1109,7 @@ class JSONProtocolValidator(object):
             mix_number = 0
             for mix in mix_list:
                 mix_number += 1
+                self._flush(errors, warnings)
                 mix_messages = self.validate_direction('mix', mix, instruction_number, group_number, 'mix', mix_number)
                 errors.extend(mix_messages.get('errors'))
                 warnings.extend(mix_messages.get('warnings'))
@@ -698,9 +1124,13 @@ class JSONProtocolValidator(object):
                         command_name,
                         command_number):
         print('validating direction')   # TODO: use logger here instead
+        if self.profiler is not None:
+            self.profiler.count('validate_direction')
         errors = []
         warnings = []
         # direction (from or to)
+        # read with get() from the raw dict: parsing a record only to read
+        # it once costs more than it saves
         if not isinstance(command_direction, dict):
             errors.append(
                 'Instructions {} "{}" MUST be an object (hint: \{ \} ), at instruction number {}, group number {}, command number {}'
@@ -708,19 +1138,16 @@ class JSONProtocolValidator(object):
             )
         else:
             # required - direction attributes
-            direction_container = command_direction.get('container')
-            direction_location = command_direction.get('location')
+            get = command_direction.get
+            direction_container = get('container')
+            direction_location = get('location')
 
             # optional - direction attributes
-            tip_offset = command_direction.get('tip-offset')
-            delay = command_direction.get('delay')
-            touch_tip = command_direction.get('touch-tip')
-            blowout = command_direction.get('blowout')
-            extra_pull = command_direction.get('extra-pull')
-            liquid_tracking = command_direction.get('liquid-tracking')
-            repetitions = None
-            if direction == 'mix':
-                repetitions = command_direction.get('repetitions')
+            delay = get('delay')
+            touch_tip = get('touch-tip')
+            blowout = get('blowout')
+            extra_pull = get('extra-pull')
+            liquid_tracking = get('liquid-tracking')
 
 
             if direction_container is None or direction_location is None:
@@ -731,27 +1158,18 @@ class JSONProtocolValidator(object):
             else:
                 # container -> location
                 if direction_container not in self.deck:
-                    print('DECK: ', list(self.deck.data.keys()))
                     errors.append(
                         'Instructions {} "{}"\'s container "{}" not found in Deck, at instruction number {}, group number {}, command number {}'
                         .format(command_name, direction, direction_container, instruction_number, group_number, command_number)
                     )
                 else:
                     # location
-                    labware = self.deck.data.get(direction_container).get('labware')
-                    if not self.containers.has_location(labware, direction_location):
-                        errors.append(
-                            'Instruction {} "{}" container "{}" location "{}" not found in "{}", at instruction number {}, group number {}, command number {}'
-                            .format(command_name, direction, direction_container, labware,instruction_number, group_number, command_number)
-                        )
+                    labware = self.deck.labware(direction_container)
+                    if self.profiler is not None:
+                        self.profiler.count('Containers.has_location')
+                    self._catalog_check(errors, _direction_location_errors, command_name, direction, direction_container,
+                                        direction_location, labware, instruction_number, group_number, command_number)
                 # OPTIONAL
-                # tip-offset
-                if tip_offset:
-                    if tip_offset < -30 or tip_offset > 30:
-                        warnings.append(
-                            'Instruction {} "{}" "tip-offset" has an unusually large magnitude, at instructions number {}, group number {}, command number {}'
-                            .format(command_name, direction, instruction_number, group_number, command_number)
-                        )
                 # delay
                 if delay:
                     if delay < 0:
@@ -788,14 +1206,119 @@ class JSONProtocolValidator(object):
                             'Instruction {} "{}" "liquid-tracking" MUST be "true" or "false", at instruction number {}, group number {}, command number {}'
                             .format(command_name, direction, instruction_number, group_number, command_number)
                         )
-                # mix->repetitions
-                if direction == 'mix':
-                    if repetitions is None:
-                        warnings.append(
-                            'Instruction {} "{}" "repetitions" could be set but is not, at instruction number {}, group number {}, command number {}'
-                            .format(command_name, direction, instruction_number, group_number, command_number)
-                        )
+                # registry rules
+                checks = self.rules['direction']
+                if checks:
+                    self._apply_rules(checks, errors, warnings, direction, command_direction, command_name,
+                                      instruction_number, group_number, command_number)
 
 
         messages = {'errors': errors, 'warnings': warnings}
         return messages
+
+
+class ProtocolValidator(object):
+    """
+    Reusable validator, configured once with the containers catalog and
+    rules and then used for any number of protocols.
+
+    All per-protocol state lives in a JSONProtocolValidator built for each
+    validate() call; the shared catalog and limits are only read, so one
+    instance can serve many threads at once.
+    """
+
+    def __init__(self, containers, limits: ProtocolLimits=None, registry: RuleRegistry=None):
+        if not isinstance(containers, Containers):
+            # raises loader.ProtocolLoadError: a broken catalog should fail
+            # at configuration time, not on every request
+            containers = Containers(loader.load(containers))
+        self.containers = containers
+        self.limits = limits
+        self.registry = registry
+
+    def validate(self, protocol, profile=False, summary=None, rules=None) -> dict:
+        """
+        Validates a protocol given as anything loader.load() accepts.
+        """
+        return JSONProtocolValidator(self.containers, protocol, self.limits, self.registry).validate(profile, summary, rules)
+
+    def estimate_runtime(self, protocol, **constants) -> dict:
+        """
+        Estimates the run time of a protocol, see RunTimeEstimator.
+        """
+        return JSONProtocolValidator(self.containers, protocol, self.limits, self.registry).estimate_runtime(**constants)
+
+    def validate_containers(self) -> dict:
+        """
+        Validates the containers catalog itself rather than a protocol.
+        """
+        return self.containers.lint()
+
+
+class MultiCatalogValidator(object):
+    """
+    Validates protocols against several containers catalogs at once, e.g.
+    the current and the next catalog version, given as {name: catalog}.
+    The first catalog is the baseline the others are compared to.
+
+    Each protocol is loaded, parsed and validated once, with the checks
+    that read the catalog recorded rather than run (see
+    record_catalog_checks); only those are then run against each catalog.
+    Catalogs whose entries for the protocol's labware are all equal give
+    the same messages, so they are resolved once.
+    """
+
+    def __init__(self, catalogs: dict, limits: ProtocolLimits=None, registry: RuleRegistry=None):
+        if not catalogs:
+            raise ValueError('MultiCatalogValidator needs at least one catalog')
+        self.catalogs = {}
+        for name, containers in catalogs.items():
+            if not isinstance(containers, Containers):
+                containers = Containers(loader.load(containers))
+            self.catalogs[name] = containers
+        self.limits = limits
+        self.registry = registry
+
+    def validate(self, protocol, summary=None, rules=None) -> dict:
+        """
+        Returns {'catalogs': {name: messages}, 'differences': {name: {
+        'errors_added', 'errors_removed', 'warnings_added',
+        'warnings_removed'}}, 'breaks': [names]}, differences being
+        relative to the baseline and breaks the catalogs adding errors.
+        """
+        names = list(self.catalogs)
+        validator = JSONProtocolValidator(self.catalogs[names[0]], protocol, self.limits, self.registry)
+        recorded = validator.record_catalog_checks(rules)
+        labware_names = validator.referenced_labware()
+
+        results = {}
+        resolved = []  # (catalog entries, messages) of each distinct catalog
+        for name in names:
+            containers = self.catalogs[name]
+            entries = containers.entries(labware_names)
+            for resolved_entries, messages in resolved:
+                if resolved_entries == entries:
+                    break
+            else:
+                messages = resolve_catalog_checks(recorded, containers)
+                if summary is not None:
+                    message_summary = MessageSummary(max_locations=summary)
+                    message_summary.extend(messages)
+                    messages.update(message_summary.messages())
+                resolved.append((entries, messages))
+            results[name] = messages
+
+        baseline = results[names[0]]
+        differences = {}
+        breaks = []
+        for name in names[1:]:
+            difference = {}
+            for kind in ('errors', 'warnings'):
+                baseline_messages = set(baseline[kind])
+                messages = set(results[name][kind])
+                difference[kind + '_added'] = [message for message in results[name][kind] if message not in baseline_messages]
+                difference[kind + '_removed'] = [message for message in baseline[kind] if message not in messages]
+            differences[name] = difference
+            if difference['errors_added']:
+                breaks.append(name)
+        return {'catalogs': results, 'differences': differences, 'breaks': breaks}
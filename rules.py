@@ -0,0 +1,166 @@
+import time
+
+from .deck_layout import DeckLayout
+from .ingredients import IngredientTracker
+
+
+# what a rule checks, and the arguments its check is called with:
+#   tool         -- (validator, tool_name, tool: Tool)
+#   deck         -- (validator, container_name, entry: DeckEntry)
+#   instruction  -- (validator, instruction, instruction_number)
+#   direction    -- (validator, direction_label, direction, command_name,
+#                    instruction_number, group_number, command_number)
+#   aspiration   -- (validator, command_name, tool_name, volume, distribute,
+#                    instruction_number, group_number, command_number), a
+#                    volume taken up by the instruction's tool
+#   dispense     -- (validator, command_name, destination, volume,
+#                    instruction_number, group_number, command_number), a
+#                    volume dispensed into a destination direction
+#   protocol     -- (validator, protocol: Protocol), once, after the
+#                    instructions are validated
+SCOPES = ('tool', 'deck', 'instruction', 'direction', 'aspiration', 'dispense', 'protocol')
+
+
+class Rule(object):
+    """
+    A check run by the validator on every subject of its scope. The check
+    returns a messages dict, or None when it has nothing to report.
+    """
+
+    __slots__ = ('name', 'scope', 'check', 'enabled', 'order')
+
+    def __init__(self, name, scope, check, enabled=True, order=0):
+        if scope not in SCOPES:
+            raise ValueError('Rule "{}" scope MUST be one of {}'.format(name, SCOPES))
+        self.name = name
+        self.scope = scope
+        self.check = check
+        self.enabled = enabled
+        self.order = order
+
+
+class RuleRegistry(object):
+    """
+    Named rules the validator dispatches by scope.
+
+    dispatch() resolves the rules enabled for a validation run into one
+    tuple of checks per scope, so a disabled rule is not even looked at on
+    the hot path. Rules run by increasing order, then registration order.
+    """
+
+    def __init__(self):
+        self.rules = {}
+
+    def register(self, name, scope, check, enabled=True, order=0) -> Rule:
+        if name in self.rules:
+            raise ValueError('Rule "{}" is already registered'.format(name))
+        rule = self.rules[name] = Rule(name, scope, check, enabled, order)
+        return rule
+
+    def rule(self, name, scope, enabled=True, order=0):
+        """
+        Decorator registering a check function
+        """
+        def decorator(check):
+            self.register(name, scope, check, enabled, order)
+            return check
+        return decorator
+
+    def copy(self) -> "RuleRegistry":
+        """
+        Returns a registry with the same rules, e.g. to add site-specific
+        rules without changing the default registry
+        """
+        registry = RuleRegistry()
+        for rule in self.rules.values():
+            registry.register(rule.name, rule.scope, rule.check, rule.enabled, rule.order)
+        return registry
+
+    def dispatch(self, enabled: dict=None, profiler=None) -> dict:
+        """
+        Returns {scope: (checks...)} of the rules enabled by default, as
+        overridden by enabled ({rule name: bool}). With a profiler, every
+        check reports its calls and time to it.
+        """
+        enabled = enabled or {}
+        for name in enabled:
+            if name not in self.rules:
+                raise ValueError('Unknown rule "{}"'.format(name))
+        checks = {scope: [] for scope in SCOPES}
+        rules = sorted(self.rules.values(), key=lambda rule: rule.order)
+        for rule in rules:
+            if not enabled.get(rule.name, rule.enabled):
+                continue
+            check = rule.check
+            if profiler is not None:
+                check = _timed(rule.name, check, profiler)
+            checks[rule.scope].append(check)
+        return {scope: tuple(scope_checks) for scope, scope_checks in checks.items()}
+
+
+def _timed(name, check, profiler):
+    def timed_check(*args):
+        start = time.perf_counter()
+        try:
+            return check(*args)
+        finally:
+            profiler.rule(name, time.perf_counter() - start)
+    return timed_check
+
+
+default_registry = RuleRegistry()
+
+
+@default_registry.rule('tip-offset-magnitude', 'direction')
+def check_tip_offset(validator, direction_label, direction, command_name, instruction_number, group_number, command_number):
+    tip_offset = direction.get('tip-offset')
+    if tip_offset and (tip_offset < -30 or tip_offset > 30):
+        return {'errors': [], 'warnings': [
+            'Instruction {} "{}" "tip-offset" has an unusually large magnitude, at instructions number {}, group number {}, command number {}'
+            .format(command_name, direction_label, instruction_number, group_number, command_number)
+        ]}
+    return None
+
+
+@default_registry.rule('mix-repetitions', 'direction')
+def check_mix_repetitions(validator, direction_label, direction, command_name, instruction_number, group_number, command_number):
+    if direction_label == 'mix' and direction.get('repetitions') is None:
+        return {'errors': [], 'warnings': [
+            'Instruction {} "{}" "repetitions" could be set but is not, at instruction number {}, group number {}, command number {}'
+            .format(command_name, direction_label, instruction_number, group_number, command_number)
+        ]}
+    return None
+
+
+@default_registry.rule('tool-capacity', 'aspiration')
+def check_tool_capacity(validator, command_name, tool, volume, distribute, instruction_number, group_number, command_number):
+    # also counts the aspirations, so with this rule disabled there are none
+    # to report or to check the calibration range of
+    return validator.validate_capacity(command_name, tool, volume, distribute, instruction_number, group_number, command_number)
+
+
+@default_registry.rule('well-overflow', 'dispense')
+def check_well_overflow(validator, command_name, destination, volume, instruction_number, group_number, command_number):
+    return validator.validate_destination(command_name, destination, volume, instruction_number, group_number, command_number)
+
+
+@default_registry.rule('deck-layout', 'protocol')
+def check_deck_layout(validator, protocol):
+    # slot collisions and placement suggestions for slot-less containers
+    return DeckLayout(validator.deck, validator.DECK_SLOTS).messages()
+
+
+@default_registry.rule('ingredient-tracking', 'protocol')
+def check_ingredient_tracking(validator, protocol):
+    # traces ingredients through the instructions to report cross-contamination
+    ingredients = protocol.ingredients
+    if not ingredients or not isinstance(ingredients, dict) or not protocol.instructions:
+        return None
+    tracker = IngredientTracker(ingredients)
+    tracker.run(protocol.instructions)
+    return tracker.messages()
+
+
+@default_registry.rule('calibration-range', 'protocol')
+def check_calibration_range(validator, protocol):
+    return validator.validate_calibration()
@@ -0,0 +1,276 @@
+import functools
+import json
+import os
+
+import jsonschema
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocol_schema.json')
+
+# exact types, as produced by JSON parsing; bool is not a number here
+JSON_TYPES = {
+    'object': frozenset([dict]),
+    'array': frozenset([list]),
+    'string': frozenset([str]),
+    'boolean': frozenset([bool]),
+    'number': frozenset([int, float]),
+    'integer': frozenset([int]),
+    'null': frozenset([type(None)])
+}
+
+
+class SchemaCompiler(object):
+    """
+    Compiles the draft-04 subset used by the protocol schema (type,
+    required, properties, additionalProperties, items, min/maxProperties
+    and local $refs) into plain Python checks.
+
+    Properties whose schema is only a "type" are checked with a set lookup
+    inline rather than through a nested call, which is what makes the
+    compiled check cheaper than both jsonschema and the hand-walked checks.
+    explain() reports the errors with the same checks.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.refs = {}
+        self.checks = {}
+
+    def resolve(self, node):
+        while '$ref' in node:
+            ref = node['$ref']
+            if not ref.startswith('#/'):
+                raise ValueError('Only local $refs are supported, got "{}"'.format(ref))
+            node = self.schema
+            for part in ref[2:].split('/'):
+                node = node[part]
+        return node
+
+    def simple_types(self, node):
+        node = self.resolve(node)
+        if set(node) == {'type'} and isinstance(node['type'], str):
+            return JSON_TYPES[node['type']]
+        return None
+
+    def compile(self, node=None):
+        if node is None:
+            node = self.schema
+        ref = node.get('$ref')
+        if ref is not None:
+            check = self.refs.get(ref)
+            if check is None:
+                # placeholder first, so recursive schemas terminate
+                target = []
+                self.refs[ref] = lambda value: target[0](value)
+                target.append(self.compile(self.resolve(node)))
+                check = self.refs[ref] = target[0]
+            return check
+
+        unsupported = set(node) - {'type', 'required', 'properties', 'additionalProperties',
+                                   'items', 'minProperties', 'maxProperties', 'definitions',
+                                   '$schema', 'title', 'description'}
+        if unsupported:
+            raise ValueError('Unsupported schema keywords {}'.format(sorted(unsupported)))
+
+        types = JSON_TYPES[node['type']] if 'type' in node else None
+        if types is not None and dict in types:
+            return self._compile_object(node, types)
+        if types is not None and list in types:
+            return self._compile_array(node, types)
+        if types is None:
+            return lambda value: True
+        return lambda value: type(value) in types
+
+    def check_for(self, node):
+        """
+        Compiled check of a schema node, compiled once per node
+        """
+        check = self.checks.get(id(node))
+        if check is None:
+            check = self.checks[id(node)] = self.compile(node)
+        return check
+
+    def explain(self, node, value, path, errors, max_errors):
+        """
+        Appends (path, message) for every way value breaks node, descending
+        only into the parts the compiled checks reject. Raises
+        _EnoughErrors once more than max_errors are found.
+        """
+        node = self.resolve(node)
+        if 'type' in node and type(value) not in JSON_TYPES[node['type']]:
+            _add_error(errors, max_errors, path, '{} is not of type {!r}'.format(_short(value), node['type']))
+            return
+        if type(value) is dict:
+            properties = node.get('properties', {})
+            additional = node.get('additionalProperties', True)
+            for key in node.get('required', ()):
+                if key not in value:
+                    _add_error(errors, max_errors, path, '{!r} is a required property'.format(key))
+            if 'minProperties' in node and len(value) < node['minProperties']:
+                _add_error(errors, max_errors, path, '{} does not have enough properties'.format(_short(value)))
+            if 'maxProperties' in node and len(value) > node['maxProperties']:
+                _add_error(errors, max_errors, path, '{} has too many properties'.format(_short(value)))
+            for key, item in value.items():
+                item_schema = properties.get(key)
+                if item_schema is None:
+                    if additional is False:
+                        _add_error(errors, max_errors, path,
+                                   'Additional properties are not allowed ({!r} was unexpected)'.format(key))
+                        continue
+                    if additional is True:
+                        continue
+                    item_schema = additional
+                if not self.check_for(item_schema)(item):
+                    self.explain(item_schema, item, path + (key,), errors, max_errors)
+        elif type(value) is list and 'items' in node:
+            item_check = self.check_for(node['items'])
+            for index, item in enumerate(value):
+                if not item_check(item):
+                    self.explain(node['items'], item, path + (index,), errors, max_errors)
+
+    def _compile_object(self, node, types):
+        required = tuple(node.get('required', ()))
+        min_properties = node.get('minProperties')
+        max_properties = node.get('maxProperties')
+        simple = {}
+        nested = {}
+        for key, property_schema in node.get('properties', {}).items():
+            property_types = self.simple_types(property_schema)
+            if property_types is not None:
+                simple[key] = property_types
+            else:
+                nested[key] = self.compile(property_schema)
+        additional = node.get('additionalProperties', True)
+        if isinstance(additional, dict):
+            additional = self.compile(additional)
+
+        def check(value):
+            if type(value) not in types:
+                return False
+            for key in required:
+                if key not in value:
+                    return False
+            if min_properties is not None and len(value) < min_properties:
+                return False
+            if max_properties is not None and len(value) > max_properties:
+                return False
+            for key, item in value.items():
+                item_types = simple.get(key)
+                if item_types is not None:
+                    if type(item) not in item_types:
+                        return False
+                    continue
+                item_check = nested.get(key)
+                if item_check is not None:
+                    if not item_check(item):
+                        return False
+                elif additional is False:
+                    return False
+                elif additional is not True and not additional(item):
+                    return False
+            return True
+        return check
+
+    def _compile_array(self, node, types):
+        items = node.get('items')
+        if items is None:
+            return lambda value: type(value) in types
+        item_types = self.simple_types(items)
+        if item_types is not None:
+            return lambda value: type(value) in types and all(type(item) in item_types for item in value)
+        item_check = self.compile(items)
+
+        def check(value):
+            if type(value) not in types:
+                return False
+            for item in value:
+                if not item_check(item):
+                    return False
+            return True
+        return check
+
+
+class StructuralValidator(object):
+    """
+    Protocol schema compiled to a fast accept/reject check. Errors of
+    rejected protocols are explained by the same compiled checks, walking
+    down only into the parts they reject.
+    """
+
+    def __init__(self, schema):
+        jsonschema.Draft4Validator.check_schema(schema)
+        self.compiler = SchemaCompiler(schema)
+        self.is_valid = self.compiler.check_for(schema)
+
+    def errors(self, protocol_data, max_errors=100) -> list:
+        """
+        Returns up to max_errors + 1 (path, message) pairs, the extra one
+        telling that there are more.
+        """
+        errors = []
+        try:
+            self.compiler.explain(self.compiler.schema, protocol_data, (), errors, max_errors)
+        except _EnoughErrors:
+            pass
+        return errors
+
+
+@functools.lru_cache(maxsize=None)
+def schema_validator() -> StructuralValidator:
+    """
+    Returns the protocol schema validator, compiled once per process.
+    Validators only read their schema, so the instance is shared by threads.
+    """
+    with open(SCHEMA_PATH) as schema_json:
+        schema = json.load(schema_json)
+    return StructuralValidator(schema)
+
+
+def format_path(path) -> str:
+    """
+    Renders an error path as e.g. instructions[0].groups[1].transfer
+    """
+    rendered = ''
+    for part in path:
+        if isinstance(part, int):
+            rendered += '[{}]'.format(part)
+        else:
+            rendered += ('.' if rendered else '') + str(part)
+    return rendered or 'protocol'
+
+
+def structural_messages(protocol_data: dict, max_errors=100) -> dict:
+    """
+    Runs the structural (types, required keys, arrays vs objects) pass
+    over raw protocol data. At most max_errors errors are reported.
+    """
+    errors = []
+    validator = schema_validator()
+    if not validator.is_valid(protocol_data):
+        for path, message in validator.errors(protocol_data, max_errors):
+            if len(errors) == max_errors:
+                errors.append(
+                    'Protocol JSON structure has more errors, only the first {} are reported'
+                    .format(max_errors)
+                )
+                break
+            errors.append(
+                'Protocol JSON structure error at "{}": {}'
+                .format(format_path(path), message)
+            )
+    return {'errors': errors, 'warnings': []}
+
+
+class _EnoughErrors(Exception):
+    pass
+
+
+def _add_error(errors, max_errors, path, message):
+    errors.append((path, message))
+    if len(errors) > max_errors:
+        raise _EnoughErrors()
+
+
+def _short(value):
+    text = json.dumps(value) if isinstance(value, (dict, list, str)) else repr(value)
+    return text if len(text) <= 40 else text[:37] + '...'
@@ -6,10 +6,10 @@ config = {
     'author_email': 'engineering@opentrons.com',
     'url': 'http://opentrons.com',
     'version': '1.0',
-    'install_requires': [],
+    'install_requires': ['jsonschema>=2.5.1'],
     'packages': find_packages(exclude=["tests"]),
     'package_data': {
-        "protocol_validator": []
+        "protocol_validator": ["protocol_schema.json"]
     },
     'scripts': [
 
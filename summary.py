@@ -0,0 +1,92 @@
+import re
+
+
+# "..., at instruction number 1, group number 2, command number 3"
+LOCATION = re.compile(r',? at (instructions? number .*)$')
+# quoted values are the subject of a message, bare numbers its details
+VALUE = re.compile(r'"([^"]*)"|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+
+def split_message(message):
+    """
+    Splits a message into (code, subject, location): the code is the
+    message with its quoted values and numbers blanked out, the subject
+    the tuple of its quoted values, and location the instruction position
+    it refers to, or None.
+    """
+    location = None
+    match = LOCATION.search(message)
+    if match is not None:
+        location = match.group(1)
+        message = message[:match.start()]
+    subject = []
+
+    def blank(value_match):
+        quoted = value_match.group(1)
+        if quoted is None:
+            return '{}'
+        subject.append(quoted)
+        return '"{}"'
+
+    code = VALUE.sub(blank, message)
+    return code, tuple(subject), location
+
+
+class MessageSummary(object):
+    """
+    Aggregates messages as they are produced, grouping them by code and
+    subject: each group keeps its first message, a count and the first
+    max_locations locations. At most max_groups groups are kept per kind,
+    messages of further groups are only counted, so the summary size is
+    bounded however many messages are added.
+    """
+
+    KINDS = ('errors', 'warnings')
+
+    def __init__(self, max_locations=5, max_groups=1000):
+        self.max_locations = max_locations
+        self.max_groups = max_groups
+        self.groups = {kind: {} for kind in self.KINDS}
+        self.counts = {kind: 0 for kind in self.KINDS}
+        self.dropped = {kind: 0 for kind in self.KINDS}
+
+    def add(self, kind, message):
+        self.counts[kind] += 1
+        code, subject, location = split_message(message)
+        groups = self.groups[kind]
+        group = groups.get((code, subject))
+        if group is None:
+            if len(groups) >= self.max_groups:
+                self.dropped[kind] += 1
+                return
+            group = groups[(code, subject)] = {
+                'code': code,
+                'subject': list(subject),
+                'message': message,
+                'count': 0,
+                'locations': []
+            }
+        group['count'] += 1
+        if location is not None and len(group['locations']) < self.max_locations:
+            group['locations'].append(location)
+
+    def extend(self, messages: dict):
+        for kind in self.KINDS:
+            for message in messages.get(kind) or ():
+                self.add(kind, message)
+
+    def messages(self) -> dict:
+        """
+        Returns the first message of every group as "errors" and
+        "warnings", and the groups themselves as "summary".
+        """
+        summary = {}
+        for kind in self.KINDS:
+            summary[kind] = list(self.groups[kind].values())
+            summary['total_' + kind] = self.counts[kind]
+            summary['dropped_' + kind] = self.dropped[kind]
+        return {
+            'errors': [group['message'] for group in summary['errors']],
+            'warnings': [group['message'] for group in summary['warnings']],
+            'summary': summary
+        }
@@ -0,0 +1,73 @@
+import unittest
+import json
+
+import protocol_validator.calibration as pcalibration
+import protocol_validator.protocol_validator as pvalid
+
+
+class CalibrationCurveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.points = [{'f1': 1, 'f2': 2}, {'f1': 5, 'f2': 6}, {'f1': 10, 'f2': 16}]
+        self.curve = pcalibration.CalibrationCurve(self.points)
+
+    def test_interpolation(self):
+        self.assertEqual(self.curve.position(1), 2)
+        self.assertEqual(self.curve.position(3), 4)
+        self.assertEqual(self.curve.position(7.5), 11)
+        # extrapolated along the end segments
+        self.assertEqual(self.curve.position(0), 1)
+        self.assertEqual(self.curve.position(12), 20)
+
+    def test_batched_matches_single(self):
+        volumes = [0, 1, 2.5, 5, 9.9, 10, 50]
+        self.assertEqual(self.curve.positions(volumes), [self.curve.position(v) for v in volumes])
+
+    def test_in_range(self):
+        self.assertTrue(self.curve.in_range(self.curve.position(10)))
+        self.assertFalse(self.curve.in_range(self.curve.position(10.5)))
+        single = pcalibration.CalibrationCurve([{'f1': 10, 'f2': 5}])
+        self.assertEqual(single.position(4), 2)
+        self.assertTrue(single.in_range(2))
+
+    def test_check(self):
+        self.assertEqual(pcalibration.CalibrationCurve.check(self.points), [])
+        self.assertEqual(len(pcalibration.CalibrationCurve.check([])), 1)
+        problems = pcalibration.CalibrationCurve.check([
+            {'f1': 1, 'f2': 1}, {'f1': 1, 'f2': 2}, {'f1': 5, 'f2': 0}
+        ])
+        self.assertEqual(len(problems), 2)
+
+
+class ValidateCalibrationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/p10s.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+
+    def test_missing_value_does_not_crash(self):
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data)
+        self.protocol_data['head']['p10']['points'].append({'f1': 12})
+        errors = validator.validate_head(self.protocol_data['head'])['errors']
+        self.assertEqual(len(errors), 1)
+        self.assertIn('MUST define both an f1 and f2', errors[0])
+
+    def test_non_monotonic_points(self):
+        self.protocol_data['head']['p10']['points'][2]['f2'] = 3
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data)
+        self.assertNotIn('p10', validator.calibration.curves)
+        self.assertEqual(len(validator.validate()['errors']), 1)
+
+    def test_extrapolated_volumes_warned_once(self):
+        transfer = self.protocol_data['instructions'][0]['groups'][0]['transfer']
+        transfer[0]['volume'] = 0.5
+        transfer.append(dict(transfer[0], volume=0.25))
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data)
+        warnings = validator.validate()['warnings']
+        calibration_warnings = [w for w in warnings if 'calibrated' in w]
+        self.assertEqual(len(calibration_warnings), 1)
+        self.assertIn('aspirates 2 volumes', calibration_warnings[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
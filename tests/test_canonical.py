@@ -0,0 +1,116 @@
+import unittest
+import json
+
+import protocol_validator.canonical as pcanonical
+import protocol_validator.protocol_validator as pvalid
+
+
+class CanonicalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+
+    def test_canonicalize(self):
+        self.protocol_data['instructions'][0]['groups'][0]['transfer'][0]['from']['delay'] = None
+        canonical = pcanonical.canonicalize(self.protocol_data)
+        self.assertEqual(canonical, self.protocol_data)
+        self.assertEqual(list(canonical), sorted(self.protocol_data))
+        self.assertEqual(pcanonical.canonicalize(canonical), canonical)
+        self.assertEqual(
+            pcanonical.to_json(canonical),
+            json.dumps(self.protocol_data, sort_keys=True, separators=(',', ':'))
+        )
+
+    def test_compact_round_trip(self):
+        compact = pcanonical.compact(self.protocol_data)
+        table = compact[pcanonical.DIRECTION_TABLE]
+        self.assertTrue(table)
+        self.assertEqual(len(set(json.dumps(direction) for direction in table)), len(table))
+        self.assertLess(len(pcanonical.to_json(compact)), len(pcanonical.to_json(self.protocol_data)))
+        self.assertEqual(pcanonical.expand(compact), pcanonical.canonicalize(self.protocol_data))
+        # the compact form is not changed by expanding it
+        self.assertIn(pcanonical.DIRECTION_TABLE, compact)
+
+    def test_compact_keeps_distinct_directions(self):
+        directions = [
+            {'container': 'plate', 'location': 'A1', 'touch-tip': True},
+            {'container': 'plate', 'location': 'A1', 'touch-tip': 1},
+            {'container': 'plate', 'location': 'A1', 'touch-tip': True},
+            {'container': 'plate', 'well': 'A1'},
+            {'container': 'plate', 'well': 'A1'},
+        ]
+        protocol = {'instructions': [{'tool': 'p10', 'groups': [{'mix': directions}]}]}
+        compact = pcanonical.compact(protocol)
+        mix = compact['instructions'][0]['groups'][0]['mix']
+        self.assertEqual(mix[0], mix[2])
+        self.assertEqual(mix[1], directions[1])
+        # not directions, so kept out of the table
+        self.assertEqual(mix[3:], directions[3:])
+        self.assertEqual(pcanonical.expand(compact), protocol)
+
+        directions.append({'$ref': 0})
+        with self.assertRaises(ValueError):
+            pcanonical.compact(protocol)
+
+    def test_compact_distribute_consolidate(self):
+        target = {'container': 'plate', 'location': 'A1', 'volume': 5}
+        source = {'container': 'tube', 'location': 'A1'}
+        groups = []
+        for number in range(20):
+            groups.append({'distribute': {'from': dict(source), 'to': [dict(target)] * 50, 'blowout': True}})
+            groups.append({'consolidate': {'from': [dict(target)] * 50, 'to': dict(source), 'blowout': True}})
+        protocol = {'instructions': [{'tool': 'p10', 'groups': groups}]}
+        compact = pcanonical.compact(protocol)
+        self.assertEqual(
+            sorted(compact[pcanonical.DIRECTION_TABLE], key=json.dumps),
+            sorted([source, target], key=json.dumps)
+        )
+        self.assertLess(len(pcanonical.to_json(compact)), len(pcanonical.to_json(protocol)) / 2)
+        self.assertEqual(pcanonical.expand(compact), protocol)
+
+    def test_bad_reference(self):
+        protocol = {
+            'direction-table': [],
+            'instructions': [{'tool': 'p10', 'groups': [{'mix': [{'$ref': 0}]}]}]
+        }
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', protocol)
+        self.assertIn('not in the protocol "direction-table"', validator.validate()['errors'][0])
+
+    def test_bad_table_entry(self):
+        protocol = {
+            'direction-table': [{'container': 'plate', 'location': 'A1', 'payload': [1, 2, 3]}],
+            'instructions': [{'tool': 'p10', 'groups': [{'mix': [{'$ref': 0}]}]}]
+        }
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', protocol)
+        self.assertIn('"direction-table" entry 0 MUST be a direction', validator.validate()['errors'][0])
+
+    def test_expansion_limited(self):
+        direction = {'container': 'plate', 'location': 'A1', 'delay': [[[[[1]]]]]}
+        protocol = {
+            'head': {}, 'deck': {},
+            'direction-table': [dict(direction, container='x' * 10000)],
+            'instructions': [{'tool': 'p10', 'groups': [{'mix': [{'$ref': 0}] * 1000}]}]
+        }
+        compact_size = len(json.dumps(protocol))
+        limits = pvalid.ProtocolLimits(max_bytes=compact_size * 2)
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', protocol, limits)
+        self.assertIsNone(validator.protocol)
+        self.assertIn('once expanded', validator.validate()['errors'][0])
+
+        protocol['direction-table'] = [direction]
+        limits = pvalid.ProtocolLimits(max_depth=9)
+        self.assertEqual(limits.check(protocol)['errors'], [])
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', protocol, limits)
+        self.assertIsNone(validator.protocol)
+        self.assertIn('nesting', validator.validate()['errors'][0])
+
+    def test_validate_compact(self):
+        expected = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate()
+        compact = pcanonical.compact(self.protocol_data)
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', compact)
+        self.assertEqual(validator.validate(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
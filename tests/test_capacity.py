@@ -0,0 +1,84 @@
+import unittest
+import json
+
+import protocol_validator.capacity as pcapacity
+import protocol_validator.model as pmodel
+import protocol_validator.protocol_validator as pvalid
+
+
+class CapacityTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+        self.protocol_data['head']['p200']['extra-pull-volume'] = 20
+        self.table = pcapacity.CapacityTable(pmodel.Head(self.protocol_data['head']))
+
+    def test_capacities(self):
+        # p200: 200 - 20 extra pull; distribute keeps 10% of 200 as margin
+        self.assertEqual(self.table.capacity('p200'), 180)
+        self.assertEqual(self.table.capacity('p200', distribute=True), 160)
+        self.assertIsNone(self.table.capacity('p1000'))
+
+    def test_aspirations(self):
+        self.assertEqual(self.table.aspirations('p200', 0), 1)
+        self.assertEqual(self.table.aspirations('p200', 180), 1)
+        self.assertEqual(self.table.aspirations('p200', 181), 2)
+        self.assertEqual(self.table.aspirations('p200', 400, distribute=True), 3)
+        self.assertIsNone(self.table.aspirations('p200', 'lots'))
+        self.assertIsNone(self.table.aspirations('p1000', 10))
+
+
+class ValidateCapacityTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = pvalid.JSONProtocolValidator(
+            'tests/fixtures/containers.json',
+            'tests/fixtures/p10s.json'
+        )
+        self.move = {
+            'from': {'container': 'plate', 'location': 'A1'},
+            'to': {'container': 'plate', 'location': 'A2'},
+            'volume': 25
+        }
+
+    def test_transfer_split(self):
+        messages = self.validator.validate_transfer([self.move], 1, 1, 'p10')
+        self.assertEqual(messages['errors'], [])
+        self.assertEqual(len(messages['warnings']), 1)
+        self.assertIn('3 aspirations', messages['warnings'][0])
+        self.assertEqual(self.validator.aspiration_count, 3)
+
+    def test_destination_overflow(self):
+        self.move['to'] = {'container': 'trash', 'location': 'A1'}
+        self.move['volume'] = 5
+        messages = self.validator.validate_transfer([self.move], 1, 1, 'p10')
+        self.assertEqual(len(messages['warnings']), 1)
+        self.assertIn('overflows', messages['warnings'][0])
+
+    def test_distribute_volumes(self):
+        distribute = {
+            'from': {'container': 'plate', 'location': 'A1'},
+            'to': [
+                {'container': 'plate', 'location': 'A2', 'volume': 5},
+                {'container': 'plate', 'location': 'A3', 'volume': 5}
+            ],
+            'blowout': False
+        }
+        messages = self.validator.validate_dist_cons(distribute, 1, 1, True, 'p10')
+        # 10ul through a p10 distributing with a 10% margin
+        self.assertEqual(len(messages['warnings']), 1)
+        self.assertEqual(self.validator.aspiration_count, 2)
+
+    def test_salient_totals(self):
+        self.assertEqual(self.validator.validate()['salient']['no_aspirations'], 1)
+
+    def test_tool_without_room(self):
+        with open('tests/fixtures/p10s.json') as protocol_json:
+            head = json.load(protocol_json)['head']
+        head['p10']['extra-pull-volume'] = 10
+        self.assertEqual(len(self.validator.validate_head(head)['errors']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
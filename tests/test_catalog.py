@@ -0,0 +1,71 @@
+import unittest
+import copy
+import json
+
+import protocol_validator.catalog as pcatalog
+import protocol_validator.protocol_validator as pvalid
+
+
+def well(x, y, volume=100):
+    return {'x': x, 'y': y, 'z': 0, 'depth': 10, 'diameter': 6, 'total-liquid-volume': volume}
+
+
+class CatalogLinterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/containers.json') as containers_json:
+            self.catalog = json.load(containers_json)
+
+    def test_fixture_catalog(self):
+        messages = pcatalog.lint_catalog(self.catalog)
+        self.assertEqual(messages['errors'], [])
+        # the misaligned tube racks
+        self.assertTrue(any('"tube-rack-2ml" has locations at y 18 and 19.5' in w for w in messages['warnings']))
+
+    def test_location_errors(self):
+        messages = pcatalog.lint_catalog({'containers': {
+            'plate': {'locations': {
+                'A1': well(0, 0),
+                'A2': well(0, 0),
+                'A3': {'x': 0, 'diameter': 6},
+                'A4': well(0, 18, volume=0),
+            }},
+            'empty': {'locations': {}},
+            'broken': {}
+        }})
+        errors = messages['errors']
+        self.assertEqual(len(errors), 5)
+        self.assertIn('"A1" and "A2" have the same coordinates', errors[2])
+        self.assertIn('MUST define numeric "y", "z"', errors[0])
+        self.assertIn('"total-liquid-volume" MUST be a positive number', errors[1])
+
+    def test_irregular_grid(self):
+        locations = {}
+        for column, x in enumerate([0, 9, 18, 28]):
+            for row, y in enumerate([0, 9, 18]):
+                locations['ABCD'[column] + str(row + 1)] = well(x, y)
+        warnings = pcatalog.lint_catalog({'containers': {'plate': {'locations': locations}}})['warnings']
+        self.assertEqual(warnings, ['Labware "plate" grid has irregular x spacing (9, 10)'])
+
+    def test_diff(self):
+        new_catalog = copy.deepcopy(self.catalog)
+        containers = new_catalog['containers']
+        del containers['point']
+        containers['new-plate'] = {'locations': {'A1': well(0, 0)}}
+        containers['96-flat']['locations']['A1']['x'] = 1
+        del containers['96-flat']['locations']['H12']
+        containers['96-flat']['origin-offset'] = {'x': 0, 'y': 0}
+        diff = pvalid.Containers(self.catalog).diff(pvalid.Containers(new_catalog))
+        self.assertEqual(diff, {
+            'added': ['new-plate'],
+            'removed': ['point'],
+            'changed': {'96-flat': {'added': [], 'removed': ['H12'], 'changed': ['A1'], 'fields': ['origin-offset']}}
+        })
+
+    def test_validate_containers(self):
+        validator = pvalid.ProtocolValidator('tests/fixtures/containers_bak.json')
+        self.assertEqual(validator.validate_containers()['errors'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import protocol_validator.deck_layout as pdeck_layout
+import protocol_validator.protocol_validator as pvalid
+
+
+SLOTS = pvalid.JSONProtocolValidator.DECK_SLOTS
+
+
+class DeckLayoutTestCase(unittest.TestCase):
+
+    def test_layout_allpassing(self):
+        layout = pdeck_layout.DeckLayout({
+            'p10-rack': {'labware': 'tiprack-10ul', 'slot': 'A1'},
+            'plate': {'labware': '96-PCR-flat', 'slot': 'B1'}
+        }, SLOTS)
+        self.assertEqual(layout.messages(), {'errors': [], 'warnings': []})
+
+    def test_collisions_and_suggestions(self):
+        layout = pdeck_layout.DeckLayout({
+            'p10-rack': {'labware': 'tiprack-10ul', 'slot': 'A1'},
+            'plate A': {'labware': '96-PCR-flat', 'slot': 'A1'},
+            'plate B': {'labware': '96-PCR-flat'},
+            'plate C': {'labware': '96-PCR-flat'},
+            'no-labware': {'slot': 'B1'}
+        }, SLOTS)
+        self.assertEqual(layout.collisions(), {'A1': ['p10-rack', 'plate A']})
+        self.assertEqual(layout.suggestions, {'plate B': 'B1', 'plate C': 'C1'})
+        messages = layout.messages()
+        self.assertEqual(len(messages['errors']), 1)
+        self.assertEqual(len(messages['warnings']), 2)
+
+    def test_independent_of_key_order(self):
+        deck = {
+            'plate C': {'labware': '96-PCR-flat'},
+            'p10-rack': {'labware': 'tiprack-10ul', 'slot': 'A1'},
+            'plate B': {'labware': '96-PCR-flat'},
+            'plate A': {'labware': '96-PCR-flat', 'slot': 'A1'}
+        }
+        layout = pdeck_layout.DeckLayout(deck, SLOTS)
+        self.assertEqual(layout.suggestions, {'plate B': 'B1', 'plate C': 'C1'})
+        reordered = pdeck_layout.DeckLayout(dict(sorted(deck.items())), SLOTS)
+        self.assertEqual(reordered.messages(), layout.messages())
+
+    def test_full_deck(self):
+        deck = {str(n): {'labware': 'point', 'slot': slot} for n, slot in enumerate(SLOTS)}
+        deck['extra'] = {'labware': 'point'}
+        layout = pdeck_layout.DeckLayout(deck, SLOTS)
+        self.assertEqual(layout.suggestions, {})
+        self.assertIn('no free slot', layout.messages()['warnings'][0])
+
+    def test_check_layouts(self):
+        decks = [
+            {'a': {'labware': 'point', 'slot': 'A1'}},
+            {'a': {'labware': 'point', 'slot': 'A1'}, 'b': {'labware': 'point', 'slot': 'A1'}}
+        ]
+        results = pdeck_layout.check_layouts(decks, SLOTS)
+        self.assertEqual([len(r['errors']) for r in results], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import json
+
+import protocol_validator.estimator as pestimator
+import protocol_validator.protocol_validator as pvalid
+
+
+class RunTimeEstimatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = pvalid.JSONProtocolValidator(
+            'tests/fixtures/containers.json',
+            'tests/fixtures/p10s.json'
+        )
+
+    def estimator(self, **constants):
+        return pestimator.RunTimeEstimator(self.validator.protocol, self.validator.containers, **constants)
+
+    def test_single_transfer(self):
+        estimate = self.estimator().estimate()
+        # tip pick-up, aspirate, dispense, tip drop
+        self.assertEqual(estimate['visits'], 4)
+        total = estimate['total']
+        self.assertEqual(total['tip_change'], 4.0)
+        # p10: 20mm stroke over 10ul, 10ul at 500 and 300 mm/min
+        self.assertAlmostEqual(total['plunger'], 20 / 500.0 * 60 + 20 / 300.0 * 60)
+        self.assertAlmostEqual(
+            total['total'],
+            total['move'] + total['plunger'] + total['tip_change'] + total['delay']
+        )
+        self.assertEqual(estimate['instructions'][0], total)
+
+    def test_geometry(self):
+        estimator = self.estimator(slot_pitch=(100.0, 50.0))
+        self.assertEqual(estimator.slot_origin('C2'), (200.0, 50.0))
+        self.assertIsNone(estimator.position('FAKE', 'A1'))
+        well = self.validator.containers.data['containers']['96-PCR-flat']['locations']['A2']
+        self.assertEqual(estimator.position('plate', 'A2'), (200.0 + well['x'], well['y']))
+
+    def test_unknown_constant(self):
+        with self.assertRaises(TypeError):
+            self.estimator(warp_speed=9)
+
+    def test_scales_with_moves(self):
+        reusable = pvalid.ProtocolValidator('tests/fixtures/containers.json')
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            protocol_data = json.load(protocol_json)
+        single = reusable.estimate_runtime(protocol_data)
+        protocol_data['instructions'] = protocol_data['instructions'] * 3
+        tripled = reusable.estimate_runtime(protocol_data)
+        self.assertEqual(len(tripled['instructions']), 3 * len(single['instructions']))
+        self.assertAlmostEqual(tripled['total']['plunger'], 3 * single['total']['plunger'])
+
+    def test_unloaded_protocol(self):
+        self.assertIsNone(pvalid.JSONProtocolValidator('', '').estimate_runtime())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import protocol_validator.ingredients as pingredients
+import protocol_validator.protocol_validator as pvalid
+
+
+def direction(container, location):
+    return {'container': container, 'location': location}
+
+
+def move(from_location, to_location):
+    return {
+        'from': direction('plate', from_location),
+        'to': direction('plate', to_location),
+        'volume': 5
+    }
+
+
+class IngredientTrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ingredients = {
+            'water': [direction('plate', 'A1')],
+            'dna': [direction('plate', 'B1')]
+        }
+
+    def test_separate_tips_allpassing(self):
+        tracker = pingredients.IngredientTracker(self.ingredients)
+        tracker.run([{'tool': 'p10', 'groups': [
+            {'transfer': [move('A1', 'A2')]},
+            {'transfer': [move('B1', 'A2')]}
+        ]}])
+        self.assertEqual(tracker.unexpected_mixtures(), [])
+        self.assertEqual(tracker.tip_reuse, [])
+        self.assertEqual(
+            tracker.ingredient_names(tracker.intended[tracker.wells[('plate', 'A2')]]),
+            ['water', 'dna']
+        )
+
+    def test_tip_reuse_contaminates(self):
+        tracker = pingredients.IngredientTracker(self.ingredients)
+        tracker.run([{'tool': 'p10', 'groups': [
+            {'transfer': [move('A1', 'A2'), move('B1', 'B2')]}
+        ]}])
+        self.assertEqual(len(tracker.tip_reuse), 1)
+        self.assertEqual(
+            sorted(tracker.unexpected_mixtures()),
+            [('plate', 'B1', ['water']), ('plate', 'B2', ['water'])]
+        )
+        self.assertIn(
+            'container "plate" location "A1" and container "plate" location "B1"',
+            tracker.messages()['warnings'][0]
+        )
+
+    def test_distribute_and_mix(self):
+        tracker = pingredients.IngredientTracker(self.ingredients)
+        tracker.run([{'tool': 'p10', 'groups': [
+            {'distribute': {'from': direction('plate', 'A1'),
+                            'to': [direction('plate', 'A2'), direction('plate', 'A3')],
+                            'blowout': False}},
+            {'mix': [direction('plate', 'A3'), direction('plate', 'B1')]}
+        ]}])
+        self.assertEqual(tracker.unexpected_mixtures(), [('plate', 'B1', ['water'])])
+        self.assertEqual(len(tracker.messages()['warnings']), 2)
+
+
+class ValidateIngredientsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = pvalid.JSONProtocolValidator(
+            'tests/fixtures/containers.json',
+            'tests/fixtures/p10s.json'
+        )
+
+    def test_ingredients_allpassing(self):
+        messages = self.validator.validate_ingredients({'water': [direction('plate', 'A1')]})
+        self.assertEqual(messages['errors'], [])
+        self.assertEqual(messages['warnings'], [])
+
+    def test_ingredient_errors(self):
+        messages = self.validator.validate_ingredients({
+            'water': [direction('FAKE-CONTAINER', 'A1'), direction('plate', 'Z99')],
+            'dna': {'container': 'plate'}
+        })
+        self.assertEqual(len(messages['errors']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import json
+import time
+
+import protocol_validator.limits as plimits
+import protocol_validator.protocol_validator as pvalid
+
+
+class ProtocolLimitsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+        self.protocol_string = json.dumps(self.protocol_data)
+
+    def test_no_limits_allpassing(self):
+        limits = plimits.ProtocolLimits()
+        self.assertEqual(len(limits.check('tests/fixtures/protocol.json')['errors']), 0)
+        self.assertEqual(len(limits.check(self.protocol_string)['errors']), 0)
+        self.assertEqual(len(limits.check(self.protocol_data)['errors']), 0)
+
+    def test_max_bytes(self):
+        limits = plimits.ProtocolLimits(max_bytes=1000)
+        self.assertEqual(len(limits.check('tests/fixtures/protocol.json')['errors']), 1)
+        self.assertEqual(len(limits.check(self.protocol_string)['errors']), 1)
+
+    def test_counts_match_dict_and_stream(self):
+        instructions = self.protocol_data['instructions']
+        most_groups = max(len(i['groups']) for i in instructions)
+        for kind, number in [('instructions', len(instructions)), ('groups', most_groups)]:
+            at_limit = plimits.ProtocolLimits(**{'max_' + kind: number})
+            below_limit = plimits.ProtocolLimits(**{'max_' + kind: number - 1})
+            for protocol in (self.protocol_string, self.protocol_data):
+                self.assertEqual(len(at_limit.check(protocol)['errors']), 0)
+                self.assertEqual(len(below_limit.check(protocol)['errors']), 1)
+
+    def test_max_commands_across_chunks(self):
+        move = {'from': {'container': 'plate', 'location': 'A1'},
+                'to': {'container': 'plate', 'location': 'A2'},
+                'volume': 10}
+        protocol = {'instructions': [{'tool': 'p10', 'groups': [
+            {'transfer': [move] * 3000},
+            {'distribute': {'from': move['from'], 'to': [move['to']] * 100}}
+        ]}]}
+        protocol_string = json.dumps(protocol)
+        self.assertGreater(len(protocol_string), plimits.ProtocolLimits.CHUNK_SIZE)
+        for protocol_input in (protocol_string, protocol):
+            self.assertEqual(len(plimits.ProtocolLimits(max_commands=3100).check(protocol_input)['errors']), 0)
+            self.assertEqual(len(plimits.ProtocolLimits(max_commands=3099).check(protocol_input)['errors']), 1)
+
+    def test_max_depth(self):
+        nested = {'info': {'a': [[[[{'b': 1}]]]]}}
+        self.assertEqual(len(plimits.ProtocolLimits(max_depth=7).check(nested)['errors']), 0)
+        self.assertEqual(len(plimits.ProtocolLimits(max_depth=6).check(nested)['errors']), 1)
+        self.assertEqual(len(plimits.ProtocolLimits(max_depth=6).check(json.dumps(nested))['errors']), 1)
+
+    def test_validator_rejects_before_loading(self):
+        validator = pvalid.JSONProtocolValidator(
+            'tests/fixtures/containers.json',
+            'tests/fixtures/protocol.json',
+            plimits.ProtocolLimits(max_instructions=1)
+        )
+        self.assertIsNone(validator.protocol)
+        self.assertEqual(len(validator.validate()['errors']), 1)
+
+    def test_strings_across_chunks(self):
+        class SmallChunks(plimits.ProtocolLimits):
+            CHUNK_SIZE = 7
+        protocol = {
+            'info': {'notes': 'a\\"b[{,:' * 1000},
+            'instructions': [{'tool': 'p10', 'groups': [{'mix': []}] * 5}]
+        }
+        protocol_string = json.dumps(protocol)
+        self.assertEqual(len(SmallChunks(max_groups=5).check(protocol_string)['errors']), 0)
+        self.assertEqual(len(SmallChunks(max_groups=4).check(protocol_string)['errors']), 1)
+
+    def test_long_string_scanned_once(self):
+        protocol_string = '{"info": {"notes": "' + 'x' * (8 << 20) + '"}, "instructions": []}'
+        started = time.monotonic()
+        self.assertEqual(plimits.ProtocolLimits(max_instructions=10).check(protocol_string)['errors'], [])
+        # rescanning the open string at every chunk took close to a minute
+        self.assertLess(time.monotonic() - started, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import io
+import json
+import pathlib
+
+import protocol_validator.loader as ploader
+import protocol_validator.protocol_validator as pvalid
+
+
+class LoaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = 'tests/fixtures/p10s.json'
+        with open(self.path, 'rb') as protocol_json:
+            self.raw = protocol_json.read()
+        self.protocol_data = json.loads(self.raw)
+
+    def test_load_all_input_types(self):
+        sources = [
+            self.protocol_data,
+            self.path,
+            pathlib.Path(self.path),
+            self.raw,
+            bytearray(self.raw),
+            memoryview(self.raw),
+            self.raw.decode('utf-8'),
+            io.BytesIO(self.raw),
+            io.StringIO(self.raw.decode('utf-8'))
+        ]
+        for source in sources:
+            self.assertEqual(ploader.load(source), self.protocol_data)
+
+    def test_string_detection_does_not_stat(self):
+        self.assertEqual(ploader.resolve('  {"a": 1}')[0], ploader.RAW)
+        self.assertEqual(ploader.resolve('no/such/file.json')[0], ploader.PATH)
+
+    def test_parse_error_byte_offset(self):
+        document = '{"é": x}'
+        for source in (document, document.encode('utf-8')):
+            with self.assertRaises(ploader.ProtocolLoadError) as context:
+                ploader.load(source)
+            self.assertEqual(context.exception.offset, 7)
+
+    def test_stdlib_fallback(self):
+        orjson = ploader.orjson
+        ploader.orjson = None
+        try:
+            self.assertEqual(ploader.load(memoryview(self.raw)), self.protocol_data)
+            with self.assertRaises(ploader.ProtocolLoadError) as context:
+                ploader.load(b'{"a": 1,}')
+            self.assertEqual(context.exception.offset, 8)
+        finally:
+            ploader.orjson = orjson
+
+    def test_backends_agree(self):
+        orjson = ploader.orjson
+        documents = [b'{"a": NaN}', b'{"a": -Infinity}', b'\xef\xbb\xbf{"a": 1}', '\ufeff{"a": 1}', b'{"a": "\xff"}']
+        try:
+            for backend in (orjson, None):
+                ploader.orjson = backend
+                for document in documents:
+                    with self.assertRaises(ploader.ProtocolLoadError):
+                        ploader.load(document)
+            with self.assertRaises(ploader.ProtocolLoadError) as context:
+                ploader.load(b'{"a": "\xff"}')
+            self.assertEqual(context.exception.offset, 7)
+        finally:
+            ploader.orjson = orjson
+
+    def test_deep_nesting(self):
+        orjson = ploader.orjson
+        max_depth = ploader.MAX_DEPTH
+        deep = '{"a":' * 100000
+        # brackets in strings, escaped quotes and backslashes do not nest
+        shallow = '{"a": ["[[[\\"[[", "\\\\", "{{{"]}'
+        try:
+            for backend in (orjson, None):
+                ploader.orjson = backend
+                for document in (deep, deep.encode()):
+                    with self.assertRaises(ploader.ProtocolLoadError) as context:
+                        ploader.load(document)
+                    self.assertIn('nesting depth 100000', str(context.exception))
+                ploader.MAX_DEPTH = 2
+                self.assertEqual(ploader.load(shallow), json.loads(shallow))
+                ploader.MAX_DEPTH = max_depth
+            # past the pre-check, the standard library parser recursion
+            ploader.MAX_DEPTH = 10 ** 6
+            with self.assertRaises(ploader.ProtocolLoadError):
+                ploader.load('[' * 100000 + ']' * 100000)
+        finally:
+            ploader.orjson = orjson
+            ploader.MAX_DEPTH = max_depth
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', deep)
+        self.assertIn('Protocol JSON could not be loaded', validator.validate()['errors'][0])
+
+    def test_load_errors(self):
+        for source in ('', 'no/such/file.json', '[1, 2]', 42):
+            with self.assertRaises(ploader.ProtocolLoadError):
+                ploader.load(source)
+
+    def test_validator_reports_load_errors(self):
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', '{"deck": ')
+        errors = validator.validate()['errors']
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Protocol JSON could not be loaded', errors[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import json
+
+import protocol_validator.model as pmodel
+
+
+class ModelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+
+    def test_direction_record(self):
+        raw = {'container': 'plate A', 'location': 'A1', 'tip-offset': 2, 'comment': 'hi'}
+        direction = pmodel.Direction.parse(raw)
+        self.assertEqual(direction.container, 'plate A')
+        self.assertEqual(direction.tip_offset, 2)
+        self.assertEqual(direction.get('tip-offset'), 2)
+        self.assertEqual(direction.get('comment'), 'hi')
+        self.assertEqual(direction.get('delay', 0), 0)
+        self.assertEqual(direction.to_dict(), raw)
+        self.assertFalse(hasattr(direction, '__dict__'))
+
+    def test_strings_interned(self):
+        first = pmodel.Direction.parse(json.loads('{"container": "plate A", "location": "A1"}'))
+        second = pmodel.Direction.parse(json.loads('{"container": "plate A", "location": "A1"}'))
+        self.assertIs(first.container, second.container)
+        self.assertIs(first.location, second.location)
+
+    def test_protocol_model(self):
+        protocol = pmodel.Protocol(self.protocol_data)
+        self.assertIn('head', protocol)
+        self.assertNotIn('info', protocol)
+        self.assertIn('plate A', protocol.deck)
+        self.assertEqual(protocol.deck.labware('plate A'), '96-PCR-flat')
+        self.assertIsNone(protocol.deck.labware('FAKE'))
+        self.assertEqual(protocol.head.get('p200').volume, 200)
+        self.assertEqual(protocol.head.to_dict(), self.protocol_data['head'])
+        self.assertEqual(protocol.deck.to_dict(), self.protocol_data['deck'])
+
+    def test_instructions_not_copied(self):
+        protocol = pmodel.Protocol(self.protocol_data)
+        self.assertIs(protocol.instructions, self.protocol_data['instructions'])
+        self.assertIsInstance(protocol.instructions[0]['groups'][0]['transfer'][0]['from'], dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
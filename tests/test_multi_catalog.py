@@ -0,0 +1,74 @@
+import unittest
+import copy
+import json
+
+import protocol_validator.protocol_validator as pvalid
+
+
+class MultiCatalogValidatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/containers.json') as containers_json:
+            self.catalog = json.load(containers_json)
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+
+    def test_same_catalogs(self):
+        validator = pvalid.MultiCatalogValidator({
+            'current': 'tests/fixtures/containers.json',
+            'backup': 'tests/fixtures/containers_bak.json'
+        })
+        result = validator.validate(self.protocol_data)
+        expected = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate()
+        self.assertEqual(result['catalogs']['current'], expected)
+        self.assertEqual(result['catalogs']['backup'], expected)
+        self.assertEqual(result['breaks'], [])
+        self.assertEqual(result['differences']['backup'], {
+            'errors_added': [], 'errors_removed': [], 'warnings_added': [], 'warnings_removed': []
+        })
+
+    def test_catalog_differences(self):
+        labware = self.protocol_data['deck']['plate A']['labware']
+        removed = copy.deepcopy(self.catalog)
+        del removed['containers'][labware]
+        unused = copy.deepcopy(self.catalog)
+        del unused['containers']['384-plate']
+        validator = pvalid.MultiCatalogValidator({'current': self.catalog, 'next': removed, 'unused': unused})
+
+        validated = []
+        original = pvalid.JSONProtocolValidator.validate_instructions
+
+        def validate_instructions(validator, instructions_data):
+            validated.append(validator.containers)
+            return original(validator, instructions_data)
+
+        pvalid.JSONProtocolValidator.validate_instructions = validate_instructions
+        try:
+            result = validator.validate(self.protocol_data)
+        finally:
+            pvalid.JSONProtocolValidator.validate_instructions = original
+
+        # the instructions are only validated once, for all catalogs
+        self.assertEqual(len(validated), 1)
+        self.assertEqual(result['breaks'], ['next'])
+        for name, catalog in (('current', self.catalog), ('next', removed), ('unused', unused)):
+            expected = pvalid.JSONProtocolValidator(catalog, self.protocol_data).validate()
+            self.assertEqual(result['catalogs'][name], expected)
+        self.assertIn(
+            'Deck container "plate A"\'s labware "{}" was not found in containers data'.format(labware),
+            result['differences']['next']['errors_added']
+        )
+        self.assertFalse(result['differences']['unused']['errors_added'])
+
+    def test_summary(self):
+        removed = copy.deepcopy(self.catalog)
+        del removed['containers'][self.protocol_data['deck']['plate A']['labware']]
+        validator = pvalid.MultiCatalogValidator({'current': self.catalog, 'next': removed})
+        result = validator.validate(self.protocol_data, summary=2)
+        for name, catalog in (('current', self.catalog), ('next', removed)):
+            expected = pvalid.JSONProtocolValidator(catalog, self.protocol_data).validate(summary=2)
+            self.assertEqual(result['catalogs'][name], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import json
+
+import protocol_validator.profiling as pprofiling
+import protocol_validator.protocol_validator as pvalid
+
+
+class ProfilingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = pvalid.JSONProtocolValidator(
+            'tests/fixtures/containers.json',
+            'tests/fixtures/p10s.json'
+        )
+
+    def test_profile_not_attached_by_default(self):
+        self.assertNotIn('profile', self.validator.validate())
+
+    def test_profile_report(self):
+        message = self.validator.validate(profile=True)
+        report = message['profile']
+        phases = report['phases']
+        for phase in ['validate', 'validate;validate_deck', 'validate;validate_head',
+                      'validate;validate_instructions', 'validate;validate_instructions;transfer']:
+            self.assertIn(phase, phases)
+        self.assertEqual(phases['validate;validate_instructions;transfer']['calls'], 1)
+        # one transfer move: a "from" and a "to" direction
+        self.assertEqual(report['counters']['validate_direction'], 2)
+        self.assertEqual(report['counters']['Containers.has_location'], 2)
+        self.assertGreater(report['peak_allocation'], 0)
+        self.assertIsNone(self.validator.profiler)
+        json.loads(pprofiling.to_json(report))
+
+    def test_collapsed_uses_self_time(self):
+        report = {'phases': {
+            'validate': {'calls': 1, 'wall': 0.003, 'cpu': 0.003},
+            'validate;validate_head': {'calls': 1, 'wall': 0.001, 'cpu': 0.001}
+        }}
+        self.assertEqual(
+            pprofiling.to_collapsed(report),
+            'validate 2000\nvalidate;validate_head 1000'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import protocol_validator.loader as ploader
+import protocol_validator.protocol_validator as pvalid
+
+
+class ProtocolValidatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = pvalid.ProtocolValidator('tests/fixtures/containers.json')
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+
+    def test_matches_single_use_validator(self):
+        single_use = pvalid.JSONProtocolValidator(
+            'tests/fixtures/containers.json',
+            'tests/fixtures/protocol.json'
+        )
+        self.assertEqual(
+            self.validator.validate('tests/fixtures/protocol.json'),
+            single_use.validate()
+        )
+
+    def test_no_protocol_state_on_instance(self):
+        self.validator.validate(self.protocol_data)
+        self.assertEqual(set(vars(self.validator)), {'containers', 'limits', 'registry'})
+
+    def test_concurrent_validation(self):
+        broken = json.loads(json.dumps(self.protocol_data))
+        broken['deck']['plate A']['labware'] = 'FAKE-LABWARE'
+        protocols = [self.protocol_data, broken, 'tests/fixtures/p10s.json'] * 8
+        expected = [self.validator.validate(protocol) for protocol in protocols]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda protocol: self.validator.validate(protocol, profile=True),
+                protocols
+            ))
+        for result, expected_result in zip(results, expected):
+            self.assertIn('validate_direction', result.pop('profile')['counters'])
+            self.assertEqual(result, expected_result)
+
+    def test_bad_catalog_fails_at_configuration(self):
+        with self.assertRaises(ploader.ProtocolLoadError):
+            pvalid.ProtocolValidator('{"containers": ')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import json
+
+import protocol_validator.rules as prules
+import protocol_validator.protocol_validator as pvalid
+
+
+class RuleRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+        self.protocol_data['instructions'][0]['groups'].append({'mix': [
+            {'container': 'plate A', 'location': 'A1', 'tip-offset': 50}
+        ]})
+
+    def warnings(self, result, text):
+        return [warning for warning in result['warnings'] if text in warning]
+
+    def test_default_rules(self):
+        result = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate()
+        self.assertEqual(len(self.warnings(result, '"repetitions" could be set')), 1)
+        self.assertEqual(len(self.warnings(result, 'unusually large magnitude')), 1)
+
+    def test_disable_per_call(self):
+        validator = pvalid.ProtocolValidator('tests/fixtures/containers.json')
+        result = validator.validate(self.protocol_data, rules={'mix-repetitions': False})
+        self.assertEqual(self.warnings(result, '"repetitions" could be set'), [])
+        self.assertEqual(len(self.warnings(result, 'unusually large magnitude')), 1)
+        # only for that call
+        result = validator.validate(self.protocol_data)
+        self.assertEqual(len(self.warnings(result, '"repetitions" could be set')), 1)
+        with self.assertRaises(ValueError):
+            validator.validate(self.protocol_data, rules={'no-such-rule': True})
+
+    def test_disable_builtin_checks(self):
+        validator = pvalid.ProtocolValidator('tests/fixtures/containers.json')
+        names = ['ingredient-tracking', 'deck-layout', 'tool-capacity', 'well-overflow', 'calibration-range']
+        result = validator.validate(self.protocol_data, profile=True)
+        self.assertTrue(self.warnings(result, 'overflows'))
+        for name in names:
+            self.assertIn(name, result['profile']['rules'])
+        result = validator.validate(self.protocol_data, profile=True, rules={name: False for name in names})
+        self.assertEqual(self.warnings(result, 'overflows'), [])
+        self.assertEqual(result['salient']['no_aspirations'], 0)
+        for name in names:
+            self.assertNotIn(name, result['profile']['rules'])
+
+    def test_disabled_rules_are_not_dispatched(self):
+        registry = prules.RuleRegistry()
+        registry.register('tools', 'tool', lambda *args: None)
+        registry.register('off', 'direction', lambda *args: None, enabled=False)
+        checks = registry.dispatch()
+        self.assertEqual(len(checks['tool']), 1)
+        self.assertEqual(checks['direction'], ())
+        self.assertEqual(len(registry.dispatch({'off': True})['direction']), 1)
+
+    def test_site_rules(self):
+        registry = prules.default_registry.copy()
+
+        @registry.rule('no-plate-b', 'deck', order=-1)
+        def no_plate_b(validator, container_name, entry):
+            if container_name == 'plate B':
+                return {'errors': ['Deck container "plate B" is not allowed here'], 'warnings': []}
+
+        @registry.rule('instruction-count', 'instruction', enabled=False)
+        def instruction_count(validator, instruction, instruction_number):
+            return {'errors': [], 'warnings': ['instruction {}'.format(instruction_number)]}
+
+        self.assertNotIn('no-plate-b', prules.default_registry.rules)
+        validator = pvalid.ProtocolValidator('tests/fixtures/containers.json', registry=registry)
+        result = validator.validate(self.protocol_data, profile=True, rules={'instruction-count': True})
+        self.assertEqual(result['errors'], ['Deck container "plate B" is not allowed here'])
+        self.assertEqual([w for w in result['warnings'] if w.startswith('instruction ')], ['instruction 1', 'instruction 2'])
+        rules = result['profile']['rules']
+        self.assertEqual(rules['instruction-count']['calls'], 2)
+        self.assertEqual(rules['no-plate-b']['calls'], len(self.protocol_data['deck']))
+        self.assertIn('mix-repetitions', rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
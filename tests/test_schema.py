@@ -0,0 +1,84 @@
+import unittest
+import copy
+import json
+
+import jsonschema
+
+import protocol_validator.schema as pschema
+import protocol_validator.protocol_validator as pvalid
+
+
+class SchemaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+        self.validator = pschema.schema_validator()
+
+    def test_fixtures_allpassing(self):
+        for fixture in ('protocol.json', 'p10s.json'):
+            with open('tests/fixtures/' + fixture) as protocol_json:
+                messages = pschema.structural_messages(json.load(protocol_json))
+            self.assertEqual(messages['errors'], [])
+
+    def test_compiled_once(self):
+        self.assertIs(pschema.schema_validator(), self.validator)
+
+    def test_compiled_agrees_with_jsonschema(self):
+        move = self.protocol_data['instructions'][0]['groups'][0]['transfer'][0]
+        mutations = [
+            lambda p: p['instructions'].append('not an object'),
+            lambda p: p['instructions'][0].pop('tool'),
+            lambda p: p['instructions'][0]['groups'].append({'transfer': [], 'mix': []}),
+            lambda p: p['instructions'][0]['groups'].append({'stir': []}),
+            lambda p: p['instructions'][0]['groups'].append({'distribute': {'from': {}, 'to': []}}),
+            lambda p: p['instructions'][0]['groups'][0]['transfer'][0].update(volume='10'),
+            lambda p: p['instructions'][0]['groups'][0]['transfer'][0]['to'].update({'touch-tip': 1}),
+            lambda p: p['instructions'][0]['groups'][0]['transfer'][0]['from'].pop('location'),
+            lambda p: p['head']['p10'].update(volume=True),
+            lambda p: p['head']['p10']['points'].append({'f1': 1}),
+            lambda p: p['deck']['trash'].update(slot=2),
+            lambda p: p.update(ingredients={'water': {}}),
+            lambda p: p['instructions'][0]['groups'].append({'mix': [copy.deepcopy(move['from'])]}),
+        ]
+        for mutation in mutations:
+            protocol_data = copy.deepcopy(self.protocol_data)
+            mutation(protocol_data)
+            self.assertEqual(
+                self.validator.is_valid(protocol_data),
+                jsonschema.Draft4Validator(self.validator.compiler.schema).is_valid(protocol_data)
+            )
+
+    def test_error_paths(self):
+        self.protocol_data['instructions'][1]['groups'][2]['transfer'][0]['to'].pop('container')
+        errors = pschema.structural_messages(self.protocol_data)['errors']
+        self.assertEqual(len(errors), 1)
+        self.assertIn('"instructions[1].groups[2].transfer[0].to"', errors[0])
+
+    def test_error_paths_agree_with_jsonschema(self):
+        protocol_data = self.protocol_data
+        protocol_data['head']['p10'].update(volume=True)
+        protocol_data['deck'].pop('trash')
+        protocol_data['instructions'][0]['groups'].append({'stir': []})
+        protocol_data['instructions'][0]['groups'][0]['transfer'][0]['to'].update({'touch-tip': 1})
+        explainer = jsonschema.Draft4Validator(self.validator.compiler.schema)
+        self.assertEqual(
+            sorted(path for path, message in self.validator.errors(protocol_data)),
+            sorted(tuple(error.path) for error in explainer.iter_errors(protocol_data))
+        )
+
+    def test_error_count_bounded(self):
+        self.protocol_data['instructions'] = ['bad'] * 500
+        errors = pschema.structural_messages(self.protocol_data, max_errors=10)['errors']
+        self.assertEqual(len(errors), 11)
+
+    def test_validator_short_circuits(self):
+        self.protocol_data['instructions'][0]['groups'][0]['transfer'][0]['volume'] = 'lots'
+        validator = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data)
+        message = validator.validate(profile=True)
+        self.assertEqual(len(message['errors']), 1)
+        self.assertNotIn('validate;validate_instructions', message['profile']['phases'])
+
+
+if __name__ == '__main__':
+    unittest.main()
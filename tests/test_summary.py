@@ -0,0 +1,84 @@
+import unittest
+import json
+
+import protocol_validator.summary as psummary
+import protocol_validator.protocol_validator as pvalid
+
+
+class MessageSummaryTestCase(unittest.TestCase):
+
+    def test_split_message(self):
+        code, subject, location = psummary.split_message(
+            'Instructions Transfer "volume" MUST be positive, but it is -2.5, at instruction number 3, group number 1, command number 2'
+        )
+        self.assertEqual(code, 'Instructions Transfer "{}" MUST be positive, but it is {}')
+        self.assertEqual(subject, ('volume',))
+        self.assertEqual(location, 'instruction number 3, group number 1, command number 2')
+        self.assertEqual(psummary.split_message('Deck container "x" is odd'), ('Deck container "{}" is odd', ('x',), None))
+
+    def test_grouping_is_bounded(self):
+        summary = psummary.MessageSummary(max_locations=2, max_groups=2)
+        for n in range(1, 1001):
+            summary.add('errors', 'Container "a" not found, at instruction number {}'.format(n))
+            summary.add('errors', 'Container "b" not found, at instruction number {}'.format(n))
+            summary.add('errors', 'Container "c" not found, at instruction number {}'.format(n))
+        messages = summary.messages()
+        self.assertEqual(len(messages['errors']), 2)
+        group = messages['summary']['errors'][0]
+        self.assertEqual(group['count'], 1000)
+        self.assertEqual(group['subject'], ['a'])
+        self.assertEqual(group['locations'], ['instruction number 1', 'instruction number 2'])
+        self.assertEqual(messages['summary']['total_errors'], 3000)
+        self.assertEqual(messages['summary']['dropped_errors'], 1000)
+
+
+class SummaryModeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/fixtures/protocol.json') as protocol_json:
+            self.protocol_data = json.load(protocol_json)
+
+    def test_summary_of_a_typo(self):
+        self.protocol_data['deck']['plate X'] = self.protocol_data['deck'].pop('plate A')
+        full = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate()
+        result = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate(summary=3)
+        self.assertEqual(len(full['errors']), 12)
+        self.assertEqual(result['errors'], full['errors'][:1])
+        group = result['summary']['errors'][0]
+        self.assertEqual(group['count'], 12)
+        self.assertEqual(len(group['locations']), 3)
+        self.assertEqual(result['summary']['total_warnings'], len(full['warnings']))
+        self.assertEqual(result['salient'], full['salient'])
+
+    def test_messages_are_not_buffered(self):
+        groups = [group for instruction in self.protocol_data['instructions'] for group in instruction['groups']]
+        self.protocol_data['instructions'] = [{'tool': 'p10', 'groups': groups * 30}]
+        self.protocol_data['deck']['plate X'] = self.protocol_data['deck'].pop('plate A')
+        batches = []
+
+        class RecordingSummary(psummary.MessageSummary):
+            def extend(self, messages):
+                batches.append(sum(len(messages.get(kind) or ()) for kind in self.KINDS))
+                super(RecordingSummary, self).extend(messages)
+
+        summary_class = pvalid.MessageSummary
+        pvalid.MessageSummary = RecordingSummary
+        try:
+            result = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate(summary=3)
+        finally:
+            pvalid.MessageSummary = summary_class
+        full = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', self.protocol_data).validate()
+        expected = psummary.MessageSummary(max_locations=3)
+        expected.extend(full)
+        self.assertEqual(result['summary'], expected.messages()['summary'])
+        self.assertEqual(sum(batches), len(full['errors']) + len(full['warnings']))
+        self.assertLess(max(batches), 10)
+
+    def test_summary_of_early_return(self):
+        result = pvalid.JSONProtocolValidator('tests/fixtures/containers.json', '{"head": ').validate(summary=3)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(result['summary']['total_errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()